@@ -1,12 +1,48 @@
 """
 Analisador detalhado de marcas - mostra TODAS as linhas verticais
+-----------------------------------------------------------------
+Modo arquivo: tabela de texto (marcas_detalhadas.txt) com as linhas
+verticais do 1º PDF de entrada/.
+
+Modo lote: extrai as linhas candidatas (x, y0, y1, h, cor, página,
+arquivo) de todas as capas em paralelo e grava num arquivo colunar
+(NumPy .npz ou CSV), mais um CSV de resumo por arquivo. Serve para
+ajustar os limiares da detecção no acervo inteiro de uma vez.
+
+Uso:
+    python analisar_colunas.py                        # tabela de texto
+    python analisar_colunas.py --lote [pasta] [--csv] # marcas_colunas.npz/.csv + marcas_resumo.csv
+
+    dados = np.load("marcas_colunas.npz")
+    pretas = dados['x'][dados['preta']]
 """
 import os
+import sys
+import csv
+import time
 import fitz
+import numpy as np
+
+from leitura_pdf import abrir_pdf
+from memoria import executar_com_memoria
 
 INPUT_DIR = "./entrada"
 MM_TO_PT = 2.83465
 
+# Linha vertical candidata: mais alta que isso e mais estreita que aquilo (pt)
+ALTURA_MIN_PT = 8
+LARGURA_MAX_PT = 6
+
+# Cor "preta/registro": todos os componentes RGB abaixo desse valor
+PRETO_MAX = 0.2
+
+# Saídas do modo lote
+SAIDA_COLUNAS = "./marcas_colunas"     # + .npz ou .csv
+SAIDA_RESUMO = "./marcas_resumo.csv"
+
+# Processos do modo lote (None = nº de CPUs)
+LOTE_MAX_WORKERS = None
+
 def main():
     arquivo = next((f for f in os.listdir(INPUT_DIR) if f.endswith('.pdf')), None)
     if not arquivo: return
@@ -15,7 +51,6 @@ def main():
     page = doc[0]
     
     # Redireciona para arquivo
-    import sys
     with open("marcas_detalhadas.txt", "w", encoding="utf-8") as f:
         sys.stdout = f
         analisar_marcas(page)
@@ -23,18 +58,15 @@ def main():
     doc.close()
     print("Salvo em: marcas_detalhadas.txt")
 
-def analisar_marcas(page):
-    
-    paths = page.get_drawings()
-    
-    # Coleta TODAS as linhas verticais
+def extrair_linhas(page):
+    """Todas as linhas verticais da página: [{'x', 'y0', 'y1', 'h', 'cor'}] (pt)"""
     linhas = []
-    for p in paths:
+    for p in page.get_drawings():
         r = p['rect']
         w = r.width
         h = r.height
         
-        if h > 8 and w < 6:
+        if h > ALTURA_MIN_PT and w < LARGURA_MAX_PT:
             linhas.append({
                 'x': r.x0 + w/2,
                 'y0': r.y0,
@@ -42,6 +74,12 @@ def analisar_marcas(page):
                 'h': h,
                 'cor': p.get('color')
             })
+    return linhas
+
+def analisar_marcas(page):
+    
+    # Coleta TODAS as linhas verticais
+    linhas = extrair_linhas(page)
     
     # Ordena por X
     linhas.sort(key=lambda l: l['x'])
@@ -63,5 +101,134 @@ def analisar_marcas(page):
         
         print(f"{x_mm:>10.1f} | {y0_mm:>10.1f} | {y1_mm:>10.1f} | {h_mm:>8.1f} | {l['cor']}{destaque}")
 
+# --- MODO LOTE ---
+
+def _cor_rgb(cor):
+    """Cor do get_drawings (já em RGB) -> (r, g, b); None vira NaN"""
+    if not cor:
+        return (np.nan, np.nan, np.nan)
+    if len(cor) == 1:
+        return (cor[0], cor[0], cor[0])
+    return tuple(cor[:3])
+
+def colunas_pdf(pdf_path):
+    """
+    Linhas verticais de todas as páginas de um PDF em colunas (arrays NumPy).
+
+    Returns:
+        tuple: (colunas, resumo) onde colunas = {'x', 'y0', 'y1', 'h': float32,
+               'cor': float32 (n, 3), 'pagina': int16} e resumo = dict do arquivo
+    """
+    inicio = time.perf_counter()
+    resumo = {'arquivo': os.path.basename(pdf_path), 'erro': ''}
+    linhas, paginas = [], []
+    try:
+        doc = abrir_pdf(pdf_path)
+        try:
+            resumo['paginas'] = len(doc)
+            if len(doc):
+                resumo['trimbox_pt'] = ";".join(f"{v:.2f}" for v in doc[0].trimbox)
+            for num, page in enumerate(doc):
+                achadas = extrair_linhas(page)
+                linhas.extend(achadas)
+                paginas.extend([num] * len(achadas))
+        finally:
+            doc.close()
+    except Exception as e:
+        resumo['erro'] = str(e)
+
+    colunas = {
+        'x': np.array([l['x'] for l in linhas], dtype=np.float32),
+        'y0': np.array([l['y0'] for l in linhas], dtype=np.float32),
+        'y1': np.array([l['y1'] for l in linhas], dtype=np.float32),
+        'h': np.array([l['h'] for l in linhas], dtype=np.float32),
+        'cor': np.array([_cor_rgb(l['cor']) for l in linhas], dtype=np.float32).reshape(-1, 3),
+        'pagina': np.array(paginas, dtype=np.int16),
+    }
+    preta = np.all(colunas['cor'] < PRETO_MAX, axis=1)
+    resumo.update(
+        linhas=len(linhas),
+        pretas=int(preta.sum()),
+        sem_cor=int(np.isnan(colunas['cor'][:, 0]).sum()),
+        x_min=round(float(colunas['x'].min()), 2) if linhas else '',
+        x_max=round(float(colunas['x'].max()), 2) if linhas else '',
+        h_mediana=round(float(np.median(colunas['h'])), 2) if linhas else '',
+        h_mediana_pretas=round(float(np.median(colunas['h'][preta])), 2) if preta.any() else '',
+        tempo_s=round(time.perf_counter() - inicio, 3),
+    )
+    return colunas, resumo
+
+def analisar_lote(input_dir=INPUT_DIR, formato="npz", max_workers=LOTE_MAX_WORKERS):
+    """
+    Extrai as linhas de todas as capas da pasta em paralelo e grava
+    SAIDA_COLUNAS (.npz ou .csv) e SAIDA_RESUMO.
+
+    Returns:
+        str: caminho do arquivo colunar
+    """
+    arquivos = sorted(os.path.join(input_dir, f) for f in os.listdir(input_dir)
+                      if f.lower().endswith('.pdf') and 'capa' in f.lower())
+    if not arquivos:
+        print(f"   [AVISO] Nenhuma capa em {input_dir}")
+        return None
+    workers = min(max_workers or os.cpu_count() or 1, len(arquivos))
+    print(f"--- MARCAS EM LOTE: {len(arquivos)} capa(s), {workers} worker(s) ---")
+
+    if workers <= 1:
+        resultados = [colunas_pdf(a) for a in arquivos]
+    else:
+        # Um arquivo por tarefa: se um derrubar o worker, só ele sai com erro
+        por_arquivo = {}
+        for path, resultado, erro in executar_com_memoria(colunas_pdf, [(a, a) for a in arquivos], workers):
+            if erro:
+                # Worker derrubado por este arquivo: colunas vazias e só o erro no resumo
+                vazias = {k: np.zeros(0, dtype=np.float32) for k in ('x', 'y0', 'y1', 'h')}
+                vazias['cor'] = np.zeros((0, 3), dtype=np.float32)
+                vazias['pagina'] = np.zeros(0, dtype=np.int16)
+                resultado = (vazias, {'arquivo': os.path.basename(path), 'linhas': 0, 'erro': erro})
+            por_arquivo[path] = resultado
+        resultados = [por_arquivo[a] for a in arquivos]
+
+    # Concatena tudo; 'arquivo' é o índice em 'arquivos'
+    nomes = np.array([os.path.basename(a) for a in arquivos])
+    tabela = {k: np.concatenate([c[k] for c, _ in resultados]) for k in resultados[0][0]}
+    tabela['arquivo'] = np.concatenate([np.full(len(c['x']), i, dtype=np.int32)
+                                        for i, (c, _) in enumerate(resultados)])
+    tabela['preta'] = np.all(tabela['cor'] < PRETO_MAX, axis=1)
+
+    if formato == "csv":
+        destino = SAIDA_COLUNAS + ".csv"
+        with open(destino, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(['arquivo', 'pagina', 'x', 'y0', 'y1', 'h', 'r', 'g', 'b'])
+            for i in range(len(tabela['x'])):
+                r, g, b = tabela['cor'][i]
+                escritor.writerow([nomes[tabela['arquivo'][i]], tabela['pagina'][i],
+                                   f"{tabela['x'][i]:.3f}", f"{tabela['y0'][i]:.3f}",
+                                   f"{tabela['y1'][i]:.3f}", f"{tabela['h'][i]:.3f}",
+                                   *("" if np.isnan(v) else f"{v:.4f}" for v in (r, g, b))])
+    else:
+        destino = SAIDA_COLUNAS + ".npz"
+        np.savez_compressed(destino, arquivos=nomes, **tabela)
+
+    campos = ['arquivo', 'paginas', 'trimbox_pt', 'linhas', 'pretas', 'sem_cor', 'x_min', 'x_max',
+              'h_mediana', 'h_mediana_pretas', 'tempo_s', 'erro']
+    with open(SAIDA_RESUMO, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.DictWriter(f, fieldnames=campos)
+        escritor.writeheader()
+        for _, resumo in resultados:
+            escritor.writerow(resumo)
+
+    erros = sum(1 for _, r in resultados if r['erro'])
+    print(f"   [OK] {len(tabela['x'])} linhas de {len(arquivos)} capa(s) em {destino}; resumo em {SAIDA_RESUMO}")
+    if erros:
+        print(f"   [AVISO] {erros} arquivo(s) com erro (ver coluna 'erro' do resumo).")
+    return destino
+
 if __name__ == "__main__":
-    main()
+    args = sys.argv[1:]
+    if args and args[0] == "--lote":
+        resto = [a for a in args[1:] if a != "--csv"]
+        analisar_lote(resto[0] if resto else INPUT_DIR, "csv" if "--csv" in args else "npz")
+    else:
+        main()
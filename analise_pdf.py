@@ -1,24 +1,114 @@
-import fitz  # PyMuPDF
+"""
+Raio-X de PDF - Módulo
+----------------------
+Inspeção de PDFs (geometria, imagens, vetores, fontes) para triagem de
+arquivos problemáticos.
+
+As imagens são descritas pelo dicionário do objeto (Width, Height,
+BitsPerComponent, Filter, ColorSpace, Length), sem decodificar nem copiar
+os streams: um PDF com imagens de centenas de MB é analisado em
+milissegundos.
+
+Uso:
+    python analise_pdf.py                  # raio-X detalhado da 1ª capa de entrada/
+    python analise_pdf.py arquivo.pdf      # raio-X detalhado de um arquivo
+    python analise_pdf.py --lote [pasta]   # perfil de todos os PDFs -> JSON e CSV
+"""
 import os
+import sys
+import csv
+import json
+
+from leitura_pdf import abrir_pdf
+from memoria import executar_com_memoria
 
 # --- CONFIG ---
 INPUT_DIR = "./entrada"
 
-def analisar_pdf_profundo():
+# Relatórios do modo lote
+RELATORIO_JSON = "./raio_x_pdfs.json"
+RELATORIO_CSV = "./raio_x_pdfs.csv"
+
+# Processos do modo lote (None = nº de CPUs)
+LOTE_MAX_WORKERS = None
+
+MM_TO_PT = 2.83465
+
+# Extensão correspondente ao último filtro do stream
+EXTENSOES_FILTRO = {
+    'DCTDecode': 'jpg',
+    'JPXDecode': 'jpx',
+    'JBIG2Decode': 'jb2',
+    'CCITTFaxDecode': 'fax',
+    'FlateDecode': 'flate',
+    'LZWDecode': 'lzw',
+    'RunLengthDecode': 'rle',
+}
+
+# Componentes por espaço de cor (ICCBased/Indexed são resolvidos no objeto)
+COMPONENTES_CS = {'DeviceGray': 1, 'CalGray': 1, 'DeviceRGB': 3, 'CalRGB': 3, 'Lab': 3,
+                  'DeviceCMYK': 4, 'Indexed': 1, 'Separation': 1}
+
+def _componentes_icc(doc, xref):
+    """N de um espaço [/ICCBased n 0 R], lido do dicionário do perfil"""
+    tipo, valor = doc.xref_get_key(xref, "ColorSpace")
+    if tipo == 'xref':
+        tipo, valor = 'array', doc.xref_object(int(valor.split()[0]), compressed=True)
+    if tipo != 'array' or 'ICCBased' not in valor:
+        return None
+    ref = valor.split('ICCBased', 1)[1].split()
+    try:
+        tipo_n, n = doc.xref_get_key(int(ref[0]), "N")
+        return int(n) if tipo_n == 'int' else None
+    except (ValueError, IndexError):
+        return None
+
+def info_imagem(doc, img):
+    """
+    Metadados de uma imagem só pelo dicionário do objeto (sem decodificar).
+
+    Args:
+        doc: Documento aberto
+        img: Tupla de page.get_images(full=True)
+
+    Returns:
+        dict: xref, largura, altura, bpc, filtro, ext, colorspace, componentes,
+              bytes (stream comprimido), mascara
+    """
+    xref, smask, largura, altura, bpc, colorspace, _, _, filtro, _ = img
+    tipo, tamanho = doc.xref_get_key(xref, "Length")
+    componentes = COMPONENTES_CS.get(colorspace)
+    if colorspace == 'ICCBased':
+        componentes = _componentes_icc(doc, xref)
+    return {
+        'xref': xref,
+        'largura': largura,
+        'altura': altura,
+        'bpc': bpc,
+        'filtro': filtro or 'nenhum',
+        'ext': EXTENSOES_FILTRO.get(filtro.split()[-1] if filtro else '', 'raw'),
+        'colorspace': colorspace,
+        'componentes': componentes,
+        'bytes': int(tamanho) if tipo == 'int' else None,
+        'mascara': bool(smask),
+    }
+
+def analisar_pdf_profundo(path=None):
     print("--- INICIANDO RAIO-X DO PDF ---")
     
-    # Pega o primeiro PDF de capa
-    arquivos = os.listdir(INPUT_DIR)
-    arquivo_capa = next((f for f in arquivos if f.endswith('.pdf') and 'capa' in f.lower()), None)
-    
-    if not arquivo_capa:
-        print("ERRO: Nenhuma capa encontrada.")
-        return
-
-    path = os.path.join(INPUT_DIR, arquivo_capa)
-    print(f"Analisando arquivo: {arquivo_capa}")
+    if path is None:
+        # Pega o primeiro PDF de capa
+        arquivos = os.listdir(INPUT_DIR)
+        arquivo_capa = next((f for f in arquivos if f.endswith('.pdf') and 'capa' in f.lower()), None)
+        
+        if not arquivo_capa:
+            print("ERRO: Nenhuma capa encontrada.")
+            return
+        
+        path = os.path.join(INPUT_DIR, arquivo_capa)
+    print(f"Analisando arquivo: {os.path.basename(path)}")
     
-    doc = fitz.open(path)
+    doc = abrir_pdf(path)
     page = doc[0]
     
     # 1. GEOMETRIA BÁSICA
@@ -34,8 +124,11 @@ def analisar_pdf_profundo():
     print(f"    Total de imagens encontradas: {len(imgs)}")
     for i, img in enumerate(imgs):
         xref = img[0]
-        base_img = doc.extract_image(xref)
-        info = f"Ext: {base_img['ext']}, Size: {base_img['width']}x{base_img['height']}, Colorspace: {base_img['colorspace']}"
+        meta = info_imagem(doc, img)
+        tamanho = f"{meta['bytes'] / 1e6:.1f}MB" if meta['bytes'] is not None else "?"
+        info = (f"Ext: {meta['ext']}, Size: {meta['largura']}x{meta['altura']}, BPC: {meta['bpc']}, "
+                f"Colorspace: {meta['colorspace']} ({meta['componentes'] or '?'} comp.), "
+                f"Filtro: {meta['filtro']}, Stream: {tamanho}")
         print(f"    Imagem {i+1}: {info}")
         # Localiza onde a imagem está na página
         rects = page.get_image_rects(xref)
@@ -101,7 +194,111 @@ def analisar_pdf_profundo():
     else:
         print("    Nenhum objeto com formato de 'linha fina' e 'cor escura' foi encontrado.")
 
+    doc.close()
     print("\n--- FIM DA ANÁLISE ---")
 
+# --- MODO LOTE ---
+
+CAMPOS_CSV = ['arquivo', 'status', 'tamanho_mb', 'paginas', 'largura_mm', 'altura_mm', 'trimbox_mm',
+              'rotacao', 'imagens', 'imagens_mb', 'maior_imagem_px', 'colorspaces', 'filtros',
+              'fontes', 'fontes_nao_embutidas', 'erro']
+
+def perfil_pdf(path):
+    """
+    Perfil resumido de um PDF para triagem (só dicionários e metadados,
+    nada é renderizado nem decodificado).
+
+    Returns:
+        dict com os campos de CAMPOS_CSV (listas em 'colorspaces'/'filtros')
+    """
+    perfil = {'arquivo': os.path.basename(path), 'status': 'ok', 'erro': ''}
+    try:
+        perfil['tamanho_mb'] = round(os.path.getsize(path) / 1e6, 2)
+        doc = abrir_pdf(path)
+    except Exception as e:
+        perfil.update(status='erro', erro=str(e))
+        return perfil
+    try:
+        if doc.needs_pass:
+            perfil.update(status='criptografado')
+            return perfil
+        perfil['paginas'] = len(doc)
+        if len(doc):
+            page = doc[0]
+            perfil['largura_mm'] = round(page.mediabox.width / MM_TO_PT, 1)
+            perfil['altura_mm'] = round(page.mediabox.height / MM_TO_PT, 1)
+            perfil['trimbox_mm'] = [round(v / MM_TO_PT, 1) for v in page.trimbox]
+            perfil['rotacao'] = page.rotation
+
+        imagens = {}
+        fontes = {}
+        for pagina in range(len(doc)):
+            for img in doc.get_page_images(pagina, full=True):
+                if img[0] not in imagens:
+                    imagens[img[0]] = info_imagem(doc, img)
+            for fonte in doc.get_page_fonts(pagina, full=True):
+                # ext 'n/a' = fonte não embutida
+                fontes.setdefault(fonte[0], fonte)
+
+        perfil['imagens'] = len(imagens)
+        perfil['imagens_mb'] = round(sum(i['bytes'] or 0 for i in imagens.values()) / 1e6, 2)
+        perfil['maior_imagem_px'] = max((i['largura'] * i['altura'] for i in imagens.values()), default=0)
+        perfil['colorspaces'] = sorted({i['colorspace'] for i in imagens.values()})
+        perfil['filtros'] = sorted({i['filtro'] for i in imagens.values()})
+        perfil['fontes'] = len(fontes)
+        # Type3 não tem arquivo de fonte: os glifos estão no próprio PDF
+        perfil['fontes_nao_embutidas'] = sorted({f[3] for f in fontes.values()
+                                                 if f[1] == 'n/a' and f[2] != 'Type3'})
+    except Exception as e:
+        perfil.update(status='erro', erro=str(e))
+    finally:
+        doc.close()
+    return perfil
+
+def perfilar_lote(input_dir=INPUT_DIR, saida_json=RELATORIO_JSON, saida_csv=RELATORIO_CSV,
+                  max_workers=LOTE_MAX_WORKERS):
+    """
+    Perfila todos os PDFs da pasta em paralelo e grava o relatório em JSON e CSV.
+
+    Returns:
+        list com o perfil de cada arquivo
+    """
+    arquivos = sorted(os.path.join(input_dir, f) for f in os.listdir(input_dir) if f.lower().endswith('.pdf'))
+    if not arquivos:
+        print(f"   [AVISO] Nenhum PDF em {input_dir}")
+        return []
+    workers = min(max_workers or os.cpu_count() or 1, len(arquivos))
+    print(f"--- RAIO-X EM LOTE: {len(arquivos)} PDF(s), {workers} worker(s) ---")
+
+    if workers <= 1:
+        perfis = [perfil_pdf(a) for a in arquivos]
+    else:
+        # Um PDF por tarefa: se um derrubar o worker, só ele sai com erro
+        por_arquivo = {}
+        for path, perfil, erro in executar_com_memoria(perfil_pdf, [(a, a) for a in arquivos], workers):
+            if erro:
+                perfil = {'arquivo': os.path.basename(path), 'status': 'erro', 'erro': erro}
+            por_arquivo[path] = perfil
+        perfis = [por_arquivo[a] for a in arquivos]
+
+    with open(saida_json, "w", encoding="utf-8") as f:
+        json.dump(perfis, f, ensure_ascii=False, indent=2)
+    with open(saida_csv, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.DictWriter(f, fieldnames=CAMPOS_CSV)
+        escritor.writeheader()
+        for perfil in perfis:
+            linha = {k: (";".join(map(str, v)) if isinstance(v, list) else v) for k, v in perfil.items()}
+            escritor.writerow(linha)
+
+    problemas = [p for p in perfis if p['status'] != 'ok' or p.get('fontes_nao_embutidas')]
+    print(f"   [OK] Relatório: {saida_json} e {saida_csv}")
+    if problemas:
+        print(f"   [AVISO] {len(problemas)} arquivo(s) com erro, senha ou fontes não embutidas.")
+    return perfis
+
 if __name__ == "__main__":
-    analisar_pdf_profundo()
\ No newline at end of file
+    args = sys.argv[1:]
+    if args and args[0] == "--lote":
+        perfilar_lote(args[1] if len(args) > 1 else INPUT_DIR)
+    else:
+        analisar_pdf_profundo(args[0] if args else None)
@@ -0,0 +1,47 @@
+"""
+Arquivos de Entrada - Módulo
+----------------------------
+Localiza os arquivos de cada livro (miolo, capa, epub) na pasta de
+entrada. O índice é montado numa passada só sobre o os.listdir, em vez
+de varrer a lista inteira para cada ISBN.
+
+Usado pelo script_packshot e pelo distribuido; a estimativa recebe o
+mesmo índice, sem precisar importar o script_packshot.
+
+Uso:
+    from arquivos_entrada import indexar_arquivos, localizar_arquivos
+
+    indice = indexar_arquivos(os.listdir(INPUT_DIR), INPUT_DIR)
+    path_miolo, path_capa, path_epub = localizar_arquivos(isbn, indice, INPUT_DIR)
+"""
+import os
+
+def indexar_arquivos(arquivos, input_dir):
+    """
+    Índice dos PDFs da pasta de entrada por ISBN (prefixo antes do '_').
+
+    Returns:
+        dict: {isbn: {'miolo': caminho, 'capa': caminho}} (só as chaves encontradas)
+    """
+    indice = {}
+    for f in arquivos:
+        if not f.endswith(".pdf"):
+            continue
+        f_lower = f.lower()
+        if "miolo" in f_lower or "interior" in f_lower:
+            tipo = 'miolo'
+        elif "capa" in f_lower:
+            tipo = 'capa'
+        else:
+            continue
+        indice.setdefault(f.split('_')[0], {})[tipo] = os.path.join(input_dir, f)
+    return indice
+
+def localizar_arquivos(isbn, indice, input_dir):
+    """
+    Returns:
+        tuple: (caminho do miolo, caminho da capa, caminho do epub); None se não houver
+    """
+    livro = indice.get(isbn, {})
+    path_epub = os.path.join(input_dir, f"{isbn}.epub")
+    return livro.get('miolo'), livro.get('capa'), path_epub
@@ -0,0 +1,101 @@
+"""
+Benchmark de Inicialização
+--------------------------
+Mede o tempo de inicialização do pipeline por etapa: cada caso roda num
+processo Python novo, que importa o script_packshot e os módulos da etapa,
+e informa quais dependências pesadas acabaram carregadas.
+
+O caso "eager" importa tudo de uma vez (como o script fazia antes dos
+imports sob demanda) e serve de referência.
+
+Uso:
+    python bench_startup.py            # 10 repetições por caso
+    python bench_startup.py 30
+
+O resultado também é gravado em bench_output.txt.
+"""
+import sys
+import json
+import time
+import statistics
+import subprocess
+
+# --- CONFIGURAÇÕES ---
+BENCH_REPETICOES = 10
+BENCH_SAIDA = "bench_output.txt"
+
+# Dependências pesadas acompanhadas
+BENCH_PESADAS = ['numpy', 'cv2', 'requests', 'ebooklib', 'bs4']
+
+# Caso -> imports que a etapa faz na prática
+BENCH_CASOS = {
+    'base': ["script_packshot"],
+    'capa': ["script_packshot", "detector_capa"],
+    'ensaio': ["script_packshot"],
+    'vitrine': ["script_packshot", "vitrine"],
+    'sumario': ["script_packshot", "sumario"],
+    'sumario+ia': ["script_packshot", "sumario", "ia_local", "requests", "bs4"],
+    'eager': ["script_packshot", "detector_capa", "vitrine", "sumario", "ia_local",
+              "requests", "ebooklib", "bs4", "cv2", "numpy"],
+}
+
+_CODIGO = """
+import sys, json, time, warnings, importlib
+warnings.simplefilter("ignore")
+inicio = time.perf_counter()
+for nome in {modulos!r}:
+    importlib.import_module(nome)
+decorrido = time.perf_counter() - inicio
+print(json.dumps({{"import": decorrido, "pesadas": [m for m in {pesadas!r} if m in sys.modules]}}))
+"""
+
+def _rodar_caso(modulos):
+    """Roda um processo novo; retorna (tempo total, tempo de import, pesadas carregadas)"""
+    codigo = _CODIGO.format(modulos=modulos, pesadas=BENCH_PESADAS)
+    inicio = time.perf_counter()
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo], capture_output=True, text=True, check=True
+    ).stdout
+    total = time.perf_counter() - inicio
+    dados = json.loads(saida.strip().splitlines()[-1])
+    return total, dados['import'], dados['pesadas']
+
+def medir(repeticoes=BENCH_REPETICOES):
+    """
+    Mede todos os casos.
+
+    Returns:
+        dict: caso -> {'total_ms', 'import_ms' (medianas), 'pesadas'}
+    """
+    resultados = {}
+    for caso, modulos in BENCH_CASOS.items():
+        # Uma rodada de aquecimento (bytecode e page cache)
+        _rodar_caso(modulos)
+        totais, imports = [], []
+        for _ in range(repeticoes):
+            total, imp, pesadas = _rodar_caso(modulos)
+            totais.append(total)
+            imports.append(imp)
+        resultados[caso] = {
+            'total_ms': statistics.median(totais) * 1000,
+            'import_ms': statistics.median(imports) * 1000,
+            'pesadas': pesadas,
+        }
+    return resultados
+
+def formatar(resultados, repeticoes):
+    linhas = [
+        f"Inicialização do pipeline (mediana de {repeticoes} processos, Python {sys.version.split()[0]})",
+        f"{'caso':<12}{'processo (ms)':>15}{'imports (ms)':>15}  dependências pesadas",
+    ]
+    for caso, r in resultados.items():
+        pesadas = ", ".join(r['pesadas']) or "-"
+        linhas.append(f"{caso:<12}{r['total_ms']:>15.1f}{r['import_ms']:>15.1f}  {pesadas}")
+    return "\n".join(linhas)
+
+if __name__ == "__main__":
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else BENCH_REPETICOES
+    texto = formatar(medir(repeticoes), repeticoes)
+    print(texto)
+    with open(BENCH_SAIDA, "w", encoding="utf-8") as f:
+        f.write(texto + "\n")
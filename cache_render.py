@@ -0,0 +1,239 @@
+"""
+Cache de Renderização - Módulo
+------------------------------
+Cache em disco das páginas rasterizadas, endereçado pelo conteúdo.
+
+A chave combina o hash do conteúdo da página (content stream, o
+/Resources inteiro e as anotações (/Annots, com as aparências), com todos
+os objetos que eles referenciam: imagens, máscaras, fontes, XObjects,
+ExtGState, Shading, Pattern, ColorSpace; lidos crus, sem decodificar), a
+geometria da página,
+a área de recorte, o DPI, o espaço de cor, o alfa e o nível de
+anti-aliasing em vigor (perfis_render). Assim a mesma página
+é rasterizada uma única vez por configuração, entre etapas, processos e
+reexecuções. Os arquivos são gravados de forma atômica (os.replace), então
+vários workers podem usar a mesma pasta.
+
+O tamanho da pasta é limitado por LRU: cada acerto atualiza o mtime do
+arquivo e, quando o limite é ultrapassado, os mais antigos são apagados.
+
+Uso:
+    from cache_render import renderizar, salvar_png
+
+    pix = renderizar(page, dpi=20, colorspace=fitz.csGRAY)
+    salvar_png(page, "livro_vi_01.png", dpi=150, clip=rect)
+"""
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import fitz
+
+from leitura_pdf import origem_pdf
+
+# --- CONFIGURAÇÕES DO CACHE ---
+CACHE_ATIVO = True
+CACHE_DIR = "./cache_render"
+
+# Tamanho máximo da pasta do cache (MB)
+CACHE_MAX_MB = 2048
+
+# A cada quantas gravações (por processo) o tamanho da pasta é verificado
+CACHE_VERIFICAR_A_CADA = 50
+
+# Versão do formato da chave (mude para invalidar o cache inteiro)
+CACHE_VERSAO = 3
+
+# Hashes dos objetos do documento em uso: {xref: (hash, refs)}. Guarda só
+# um documento por vez, então não cresce ao longo de um lote
+_hash_xrefs = {'identidade': None, 'hashes': {}}
+_gravacoes = 0
+
+# Referência indireta ("12 0 R") e chaves que apontam de volta para a árvore de páginas
+RE_REFERENCIA = re.compile(r'(\d+)\s+\d+\s+R\b')
+RE_REF_PAGINA = re.compile(r'/(?:Parent|P)\s+\d+\s+\d+\s+R\b')
+
+def _identidade_arquivo(doc):
+    """
+    (caminho, tamanho, mtime) do PDF, para a memória de hashes. Um arquivo
+    substituído no mesmo caminho muda tamanho/mtime e não reaproveita nada.
+    None se o documento não vier de um arquivo (sem memória).
+    """
+    nome = origem_pdf(doc)
+    if not nome:
+        return None
+    try:
+        st = os.stat(nome)
+    except OSError:
+        return None
+    return (nome, st.st_size, st.st_mtime_ns)
+
+def _hash_xref(doc, xref, identidade):
+    """
+    Hash do objeto (dicionário + stream cru) e das referências que ele faz.
+    Memorizado por xref enquanto o mesmo arquivo (caminho, tamanho, mtime)
+    estiver em uso; trocar de arquivo limpa a memória.
+
+    Returns:
+        tuple: (hash, lista de xrefs referenciados)
+    """
+    if identidade and _hash_xrefs['identidade'] != identidade:
+        _hash_xrefs['identidade'] = identidade
+        _hash_xrefs['hashes'] = {}
+    memoria = _hash_xrefs['hashes'] if identidade else None
+    if memoria is not None and xref in memoria:
+        return memoria[xref]
+    objeto = doc.xref_object(xref, compressed=True)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(objeto.encode("utf-8", "replace"))
+    if doc.xref_is_stream(xref):
+        h.update(doc.xref_stream_raw(xref) or b"")
+    refs = [int(r) for r in RE_REFERENCIA.findall(RE_REF_PAGINA.sub('', objeto))]
+    resultado = (h.hexdigest(), refs)
+    if memoria is not None:
+        memoria[xref] = resultado
+    return resultado
+
+def _recursos_pagina(doc, xref_pagina):
+    """Texto do /Resources da página (herdado da árvore de páginas, se preciso)"""
+    xref = xref_pagina
+    for _ in range(32):
+        tipo, valor = doc.xref_get_key(xref, "Resources")
+        if tipo != 'null':
+            return valor
+        tipo, pai = doc.xref_get_key(xref, "Parent")
+        if tipo != 'xref':
+            break
+        xref = int(pai.split()[0])
+    return ""
+
+def hash_pagina(page):
+    """
+    Hash do que define a aparência da página, sem decodificar imagens:
+    content stream, geometria, o /Resources inteiro e o /Annots (as
+    anotações também são rasterizadas), com todos os objetos indiretos
+    alcançáveis a partir deles (imagens e SMasks, fontes, XObjects,
+    ExtGState, Shading, Pattern, ColorSpace, aparências das anotações...).
+    """
+    doc = page.parent
+    identidade = _identidade_arquivo(doc)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(page.read_contents())
+    h.update(repr((tuple(page.mediabox), page.rotation)).encode())
+    recursos = _recursos_pagina(doc, page.xref)
+    h.update(recursos.encode("utf-8", "replace"))
+    tipo, anotacoes = doc.xref_get_key(page.xref, "Annots")
+    anotacoes = anotacoes if tipo != 'null' else ""
+    h.update(anotacoes.encode("utf-8", "replace"))
+
+    # Fecho transitivo das referências a partir do /Resources e do /Annots
+    pendentes = [int(r) for r in RE_REFERENCIA.findall(recursos + " " + anotacoes)]
+    vistos = set()
+    while pendentes:
+        xref = pendentes.pop()
+        if xref in vistos or not 0 < xref < doc.xref_length():
+            continue
+        vistos.add(xref)
+        digest, refs = _hash_xref(doc, xref, identidade)
+        pendentes.extend(refs)
+    for xref in sorted(vistos):
+        h.update(f"{xref}:{_hash_xref(doc, xref, identidade)[0]}".encode())
+    return h.hexdigest()
+
+def _chave(page, dpi, clip, colorspace, alpha):
+    clip_txt = ",".join(f"{v:.2f}" for v in clip) if clip else "-"
+    aa = fitz.TOOLS.show_aa_level()['graphics']
+    texto = f"{CACHE_VERSAO}|{hash_pagina(page)}|{clip_txt}|{dpi}|{colorspace.name}|{int(alpha)}|aa{aa}"
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+def _caminho(chave):
+    return os.path.join(CACHE_DIR, chave[:2], f"{chave}.png")
+
+def _obter(chave):
+    """Caminho do arquivo em cache (marcando o uso para o LRU) ou None"""
+    caminho = _caminho(chave)
+    try:
+        os.utime(caminho)
+        return caminho
+    except OSError:
+        return None
+
+def _guardar(chave, pix):
+    """Grava o pixmap no cache de forma atômica e retorna o caminho"""
+    global _gravacoes
+    caminho = _caminho(chave)
+    pasta = os.path.dirname(caminho)
+    os.makedirs(pasta, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    os.close(fd)
+    try:
+        pix.save(tmp, output="png")
+        os.replace(tmp, caminho)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    _gravacoes += 1
+    if _gravacoes % CACHE_VERIFICAR_A_CADA == 0:
+        limpar_cache()
+    return caminho
+
+def limpar_cache(max_mb=None):
+    """Apaga os arquivos menos usados até a pasta caber no limite"""
+    limite = (max_mb if max_mb is not None else CACHE_MAX_MB) * 1024 * 1024
+    arquivos = []
+    total = 0
+    for raiz, _, nomes in os.walk(CACHE_DIR):
+        for nome in nomes:
+            caminho = os.path.join(raiz, nome)
+            try:
+                st = os.stat(caminho)
+            except OSError:
+                continue
+            arquivos.append((st.st_mtime, st.st_size, caminho))
+            total += st.st_size
+    if total <= limite:
+        return
+    for _, tamanho, caminho in sorted(arquivos):
+        try:
+            os.remove(caminho)
+        except OSError:
+            # Outro processo já apagou
+            continue
+        total -= tamanho
+        if total <= limite:
+            break
+
+def renderizar(page, dpi, clip=None, colorspace=fitz.csRGB, alpha=False):
+    """page.get_pixmap com cache: retorna o Pixmap do cache ou renderiza e guarda"""
+    if not CACHE_ATIVO:
+        return page.get_pixmap(dpi=dpi, clip=clip, colorspace=colorspace, alpha=alpha)
+    chave = _chave(page, dpi, clip, colorspace, alpha)
+    caminho = _obter(chave)
+    if caminho:
+        try:
+            return fitz.Pixmap(caminho)
+        except Exception:
+            # Arquivo corrompido/apagado no meio do caminho: renderiza de novo
+            pass
+    pix = page.get_pixmap(dpi=dpi, clip=clip, colorspace=colorspace, alpha=alpha)
+    _guardar(chave, pix)
+    return pix
+
+def salvar_png(page, caminho_saida, dpi, clip=None, colorspace=fitz.csRGB, alpha=False):
+    """Salva a página como PNG, copiando do cache quando possível (sem reencodar)"""
+    if not CACHE_ATIVO:
+        page.get_pixmap(dpi=dpi, clip=clip, colorspace=colorspace, alpha=alpha).save(caminho_saida)
+        return caminho_saida
+    chave = _chave(page, dpi, clip, colorspace, alpha)
+    caminho = _obter(chave)
+    if not caminho:
+        pix = page.get_pixmap(dpi=dpi, clip=clip, colorspace=colorspace, alpha=alpha)
+        caminho = _guardar(chave, pix)
+    try:
+        shutil.copyfile(caminho, caminho_saida)
+    except OSError:
+        # Removido pelo LRU de outro processo entre o acerto e a cópia
+        page.get_pixmap(dpi=dpi, clip=clip, colorspace=colorspace, alpha=alpha).save(caminho_saida)
+    return caminho_saida
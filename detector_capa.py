@@ -10,14 +10,95 @@ Uso:
     resultado = processar_capa(caminho_pdf, pasta_saida, isbn)
     # resultado['capa'] -> caminho do PNG da capa
     # resultado['quarta_capa'] -> caminho do PNG da 4ª capa
+    # resultado['sidecar'] -> {isbn}_estrutura.json (painéis em pt/mm,
+    #                         trimbox, estratégia e confiança)
+    # resultado['paginas'] -> uma entrada por página (sobrecapas, box)
 """
 import os
+import json
+import math
+import uuid
+import socket
+import hashlib
+import multiprocessing
 import fitz
-import cv2
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from cache_render import salvar_png
+from render_faixas import salvar_em_faixas, precisa_faixas
+from leitura_pdf import abrir_pdf
+from perfis_render import aplicar_perfil, renderizar_perfil
 
 MM_TO_PT = 2.83465
 
+PARTES = ['orelha_esq', 'quarta_capa', 'lombada', 'capa', 'orelha_dir']
+
+# --- PREVISÃO DA LOMBADA ---
+# Espessura de uma folha (2 páginas) em mm, por papel do miolo
+PAPEIS_ESPESSURA_MM = {
+    'offset_63': 0.080,
+    'offset_75': 0.100,
+    'offset_90': 0.120,
+    'polen_soft_70': 0.100,
+    'polen_soft_80': 0.115,
+    'polen_bold_90': 0.140,
+    'couche_90': 0.075,
+    'couche_115': 0.095,
+}
+PAPEL_PADRAO = 'offset_75'
+
+# Acréscimo fixo (cola/capa) somado à espessura do miolo
+LOMBADA_ACRESCIMO_MM = 0.5
+
+# Tolerância entre a lombada prevista e a detectada
+LOMBADA_TOLERANCIA_MIN_MM = 1.5
+LOMBADA_TOLERANCIA_FRACAO = 0.10
+
+# Intervalo central mais largo que isso não é lombada (marcas da lombada ausentes)
+LOMBADA_MAX_MM = 100
+
+# Sidecar JSON da estrutura
+SIDECAR_VERSAO = 1
+ESTRATEGIA_MARCAS = "marcas_corte_y_minimo"
+ESTRATEGIA_PREVISTA = "marcas_corte_lombada_prevista"
+ESTRATEGIA_PREVISTA_CENTRO = "lombada_prevista_no_centro"
+ESTRATEGIA_DIVERGENTE = "marcas_corte_y_minimo_lombada_divergente"
+ESTRATEGIA_GABARITO = "gabarito_verificado"
+
+# --- ÍNDICE DE GABARITOS (impressora/série) ---
+# Capas da mesma série/gráfica repetem as marcas (só a lombada muda). As
+# estruturas resolvidas com boa confiança viram gabaritos; capas novas com
+# a mesma geometria reaproveitam o gabarito depois de uma verificação barata.
+# Um {id}.json por gabarito: workers (e máquinas) só criam arquivos novos,
+# sem reescrever o índice inteiro
+GABARITOS_ATIVO = True
+GABARITOS_PASTA = "./gabaritos_capa"
+
+# Tolerância (mm) para a geometria (altura e margens da TrimBox) e as marcas
+GABARITO_TOLERANCIA_MM = 1.0
+
+# Verificação: faixa acima da sangria (só marcas, sem arte) renderizada
+# uma vez em draft; os traços verticais (>= GABARITO_MARCA_MIN_PT) achados
+# nela precisam ser exatamente as marcas do gabarito
+GABARITO_DPI_VERIFICACAO = 100
+GABARITO_MARCA_MIN_PT = 10
+
+# Sangria presumida (mm) quando o PDF não define a BleedBox
+GABARITO_SANGRIA_MM = 3.0
+
+# Folga (mm) na largura da página: numa série só a lombada muda
+GABARITO_FOLGA_LARGURA_MM = 60
+
+# Só estruturas com essa confiança entram no índice
+GABARITO_CONFIANCA_MINIMA = 0.8
+
+# Índice carregado no processo: (pasta, mtime da pasta, gabaritos)
+_gabaritos_cache = None
+
+# --- PDFs COM VÁRIAS PÁGINAS (sobrecapas, box) ---
+# Processos para detectar/exportar as páginas em paralelo
+CAPA_MAX_WORKERS = 4
+
 def _agrupar(lista, tol=5.0):
     """Agrupa valores próximos"""
     if not lista: return []
@@ -73,8 +154,43 @@ def _detectar_marcas_corte(page):
     xs = [l['x'] for l in marcas_corte]
     return _agrupar(xs)
 
-def _identificar_estrutura(colunas, trimbox):
-    """Identifica lombada, capa, quarta capa e orelhas"""
+def largura_lombada_prevista(paginas, papel=PAPEL_PADRAO):
+    """Largura esperada da lombada (mm) pelo número de páginas do miolo e o papel"""
+    folhas = math.ceil(paginas / 2)
+    return folhas * PAPEIS_ESPESSURA_MM[papel] + LOMBADA_ACRESCIMO_MM
+
+def _tolerancia_lombada(prevista_mm):
+    return max(LOMBADA_TOLERANCIA_MIN_MM, prevista_mm * LOMBADA_TOLERANCIA_FRACAO)
+
+def _calcular_intervalos(todas):
+    """Intervalos entre colunas consecutivas (ignora < 1mm)"""
+    intervalos = []
+    for i in range(len(todas) - 1):
+        x0, x1 = todas[i], todas[i+1]
+        largura_mm = (x1 - x0) / MM_TO_PT
+        if largura_mm > 1:
+            intervalos.append({
+                'idx': i,
+                'x0': x0,
+                'x1': x1,
+                'largura_mm': largura_mm
+            })
+    return intervalos
+
+def _identificar_estrutura(colunas, trimbox, lombada_prevista_mm=None):
+    """
+    Identifica lombada, capa, quarta capa e orelhas.
+
+    Sem previsão, a lombada é o menor intervalo próximo ao centro. Com a
+    largura prevista da lombada (pelo número de páginas):
+    - um intervalo central dentro da tolerância é aceito direto;
+    - se o intervalo do centro for largo demais para ser lombada (marcas
+      da lombada ausentes), a lombada prevista é inserida no centro;
+    - senão, usa o menor intervalo central, marcado como divergente.
+
+    Returns:
+        tuple: (dict com (x0, x1) de cada parte, estratégia usada)
+    """
     resultado = {
         'orelha_esq': None,
         'quarta_capa': None,
@@ -82,28 +198,18 @@ def _identificar_estrutura(colunas, trimbox):
         'capa': None,
         'orelha_dir': None
     }
+    estrategia = ESTRATEGIA_MARCAS
     
     # Adiciona bordas do TrimBox
     todas = [trimbox.x0] + list(colunas) + [trimbox.x1]
     todas = sorted(set(todas))
     
     # Calcula intervalos (ignora < 1mm)
-    intervalos = []
-    for i in range(len(todas) - 1):
-        x0, x1 = todas[i], todas[i+1]
-        largura_mm = (x1 - x0) / MM_TO_PT
-        if largura_mm > 1:
-            intervalos.append({
-                'idx': i,
-                'x0': x0,
-                'x1': x1,
-                'largura_mm': largura_mm
-            })
+    intervalos = _calcular_intervalos(todas)
     
     if len(intervalos) < 1:
-        return resultado
+        return resultado, estrategia
     
-    # Lombada = menor intervalo próximo ao centro
     centro = (trimbox.x0 + trimbox.x1) / 2
     area_central = (trimbox.x1 - trimbox.x0) * 0.4
     
@@ -112,11 +218,34 @@ def _identificar_estrutura(colunas, trimbox):
         if abs((intv['x0'] + intv['x1']) / 2 - centro) < area_central
     ]
     
-    if not intervalos_centrais:
-        return resultado
+    lombada_intv = None
+    if lombada_prevista_mm:
+        tolerancia = _tolerancia_lombada(lombada_prevista_mm)
+        candidatos = [
+            intv for intv in intervalos_centrais
+            if abs(intv['largura_mm'] - lombada_prevista_mm) <= tolerancia
+        ]
+        do_centro = next((intv for intv in intervalos if intv['x0'] <= centro <= intv['x1']), None)
+        if candidatos:
+            # Bate com a previsão: aceita direto
+            lombada_intv = min(candidatos, key=lambda x: abs(x['largura_mm'] - lombada_prevista_mm))
+            estrategia = ESTRATEGIA_PREVISTA
+        elif do_centro and do_centro['largura_mm'] > LOMBADA_MAX_MM:
+            # Sem marcas da lombada: insere a lombada prevista no centro
+            meia = lombada_prevista_mm * MM_TO_PT / 2
+            todas = sorted(set(todas + [centro - meia, centro + meia]))
+            intervalos = _calcular_intervalos(todas)
+            lombada_intv = next(intv for intv in intervalos if intv['x0'] <= centro <= intv['x1'])
+            estrategia = ESTRATEGIA_PREVISTA_CENTRO
+        else:
+            estrategia = ESTRATEGIA_DIVERGENTE
     
-    intervalos_centrais.sort(key=lambda x: x['largura_mm'])
-    lombada_intv = intervalos_centrais[0]
+    if lombada_intv is None:
+        if not intervalos_centrais:
+            return resultado, estrategia
+        # Lombada = menor intervalo próximo ao centro
+        intervalos_centrais.sort(key=lambda x: x['largura_mm'])
+        lombada_intv = intervalos_centrais[0]
     lombada_idx = intervalos.index(lombada_intv)
     
     # Lombada
@@ -138,9 +267,422 @@ def _identificar_estrutura(colunas, trimbox):
         if lombada_idx < len(intervalos) - 2:
             resultado['orelha_dir'] = (intv['x1'], todas[-1])
     
-    return resultado
+    return resultado, estrategia
+
+# --- GABARITOS ---
+
+def _posicoes_relativas(xs, trimbox):
+    """X absolutos -> [lado, mm até a borda da TrimBox daquele lado]"""
+    centro = (trimbox.x0 + trimbox.x1) / 2
+    saida = []
+    for x in xs:
+        if x <= centro:
+            saida.append(['e', round((x - trimbox.x0) / MM_TO_PT, 2)])
+        else:
+            saida.append(['d', round((trimbox.x1 - x) / MM_TO_PT, 2)])
+    return saida
+
+def _posicao_absoluta(rel, trimbox):
+    lado, mm = rel
+    return trimbox.x0 + mm * MM_TO_PT if lado == 'e' else trimbox.x1 - mm * MM_TO_PT
+
+def _faixa_marcas(page, trimbox):
+    """
+    Faixa do topo da página até a sangria (BleedBox, ou TrimBox menos
+    GABARITO_SANGRIA_MM): ali só há marcas, a arte não chega. None se não
+    houver espaço para uma marca.
+    """
+    topo = trimbox.y0 - GABARITO_SANGRIA_MM * MM_TO_PT
+    sangria = page.bleedbox
+    if page.rect.y0 + 1 < sangria.y0 < trimbox.y0:
+        topo = sangria.y0
+    if topo - page.rect.y0 < GABARITO_MARCA_MIN_PT:
+        return None
+    return fitz.Rect(page.rect.x0, page.rect.y0, page.rect.x1, topo)
+
+def marcas_na_faixa(page, trimbox):
+    """
+    Verificação barata: renderiza (draft) a faixa acima da sangria uma vez
+    e devolve o X (pt) de cada traço vertical de tinta com pelo menos
+    GABARITO_MARCA_MIN_PT de altura. None se não houver faixa.
+    """
+    faixa = _faixa_marcas(page, trimbox)
+    if faixa is None:
+        return None
+    pix = renderizar_perfil(page, 'draft', clip=faixa, dpi=GABARITO_DPI_VERIFICACAO)
+    zoom = GABARITO_DPI_VERIFICACAO / 72
+    n = pix.n
+    amostras = pix.samples
+    primeira = [None] * pix.width
+    ultima = [None] * pix.width
+    for lin in range(pix.height):
+        inicio = lin * pix.stride
+        linha = amostras[inicio:inicio + pix.width * n:n]
+        for col, valor in enumerate(linha):
+            if valor < 128:
+                if primeira[col] is None:
+                    primeira[col] = lin
+                ultima[col] = lin
+    # Sem anti-aliasing, traços finos saem pontilhados: vale a extensão
+    # entre a primeira e a última linha com tinta
+    colunas = [
+        col for col in range(pix.width)
+        if primeira[col] is not None and (ultima[col] - primeira[col] + 1) / zoom >= GABARITO_MARCA_MIN_PT
+    ]
+    # Colunas vizinhas são o mesmo traço
+    marcas = []
+    grupo = []
+    for col in colunas:
+        if grupo and col - grupo[-1] > 2:
+            marcas.append(faixa.x0 + (grupo[0] + grupo[-1] + 1) / 2 / zoom)
+            grupo = []
+        grupo.append(col)
+    if grupo:
+        marcas.append(faixa.x0 + (grupo[0] + grupo[-1] + 1) / 2 / zoom)
+    return marcas
+
+def _marcas_conferem(previstas, achadas):
+    """Cada marca prevista tem um traço achado na faixa (dentro da tolerância)"""
+    tolerancia = GABARITO_TOLERANCIA_MM * MM_TO_PT
+    return all(any(abs(x - a) <= tolerancia for a in achadas) for x in previstas)
+
+def assinatura_layout(page, trimbox, marcas_faixa):
+    """
+    Geometria que não depende da lombada: altura da TrimBox, margens até a
+    página, largura da página (com folga para a lombada) e número de
+    traços na faixa acima da sangria.
+    """
+    r = page.rect
+    margens = [trimbox.x0 - r.x0, trimbox.y0 - r.y0, r.x1 - trimbox.x1, r.y1 - trimbox.y1]
+    return {
+        'altura_mm': round(trimbox.height / MM_TO_PT, 2),
+        'margens_mm': [round(m / MM_TO_PT, 2) for m in margens],
+        'largura_mm': round(r.width / MM_TO_PT, 2),
+        'marcas_faixa': len(marcas_faixa),
+    }
+
+def _mesma_assinatura(a, b):
+    # Gabaritos sem largura/número de traços são de uma versão anterior: não valem
+    if a.get('largura_mm') is None or b.get('largura_mm') is None:
+        return False
+    if a.get('marcas_faixa') != b.get('marcas_faixa'):
+        return False
+    if abs(a['largura_mm'] - b['largura_mm']) > GABARITO_FOLGA_LARGURA_MM:
+        return False
+    valores_a = [a['altura_mm']] + a['margens_mm']
+    valores_b = [b['altura_mm']] + b['margens_mm']
+    return all(abs(x - y) <= GABARITO_TOLERANCIA_MM for x, y in zip(valores_a, valores_b))
+
+def _mesmas_marcas(a, b):
+    if len(a) != len(b):
+        return False
+    return all(la == lb and abs(ma - mb) <= GABARITO_TOLERANCIA_MM for (la, ma), (lb, mb) in zip(a, b))
+
+def carregar_gabaritos(pasta=None):
+    """
+    Gabaritos da pasta, lidos uma vez por processo. Só relê se a pasta
+    mudar (gabarito novo gravado por outro worker).
+    """
+    global _gabaritos_cache
+    pasta = pasta or GABARITOS_PASTA
+    try:
+        mtime = os.stat(pasta).st_mtime_ns
+    except OSError:
+        return []
+    if _gabaritos_cache and _gabaritos_cache[:2] == (pasta, mtime):
+        return _gabaritos_cache[2]
+    gabaritos = []
+    for nome in sorted(os.listdir(pasta)):
+        if not nome.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(pasta, nome), encoding="utf-8") as f:
+                gabaritos.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    _gabaritos_cache = (pasta, mtime, gabaritos)
+    return gabaritos
+
+def salvar_gabarito(gab, pasta=None):
+    """
+    Grava um gabarito novo em {id}.json de forma atômica. O temporário leva
+    host, pid e uuid: não colide entre máquinas que dividem a pasta (NFS).
+    """
+    pasta = pasta or GABARITOS_PASTA
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"{gab['id']}.json")
+    tmp = f"{caminho}.{socket.gethostname()}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(gab, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, caminho)
+
+def buscar_gabarito(page, trimbox, gabaritos):
+    """
+    Procura um gabarito com a mesma geometria cujas marcas previstas
+    existam nesta capa. A faixa das marcas é renderizada uma vez, para
+    todos os candidatos.
+
+    Returns:
+        tuple: (gabarito, estrutura, colunas) ou None
+    """
+    marcas_faixa = marcas_na_faixa(page, trimbox)
+    if not marcas_faixa:
+        return None
+    assinatura = assinatura_layout(page, trimbox, marcas_faixa)
+    candidatos = [g for g in gabaritos if _mesma_assinatura(g['assinatura'], assinatura)]
+    for gab in candidatos:
+        colunas = sorted(_posicao_absoluta(m, trimbox) for m in gab['marcas'])
+        estrutura = {p: None for p in PARTES}
+        for parte, (rel0, rel1) in gab['paineis'].items():
+            estrutura[parte] = (_posicao_absoluta(rel0, trimbox), _posicao_absoluta(rel1, trimbox))
+        lombada = estrutura.get('lombada')
+        if not lombada or (lombada[1] - lombada[0]) / MM_TO_PT < 1:
+            continue
+        if _marcas_conferem(colunas, marcas_faixa):
+            return gab, estrutura, colunas
+    return None
+
+def novo_gabarito(page, trimbox, colunas, estrutura, isbn):
+    """
+    Gabarito da estrutura resolvida (sem gravar; ver registrar_gabarito).
+    None se as marcas não aparecem na faixa acima da sangria: o gabarito
+    nunca seria confirmado.
+    """
+    marcas_faixa = marcas_na_faixa(page, trimbox)
+    if not marcas_faixa or not _marcas_conferem(colunas, marcas_faixa):
+        return None
+    assinatura = assinatura_layout(page, trimbox, marcas_faixa)
+    marcas = _posicoes_relativas(sorted(colunas), trimbox)
+    paineis = {
+        parte: _posicoes_relativas(coords, trimbox)
+        for parte, coords in estrutura.items() if coords
+    }
+    return {
+        'id': hashlib.sha1(json.dumps([assinatura, marcas]).encode()).hexdigest()[:10],
+        'assinatura': assinatura,
+        'marcas': marcas,
+        'paineis': paineis,
+        'origem': isbn,
+    }
+
+def registrar_gabarito(gabaritos, gab):
+    """Adiciona o gabarito ao índice e grava, se ainda não houver um igual"""
+    for existente in gabaritos:
+        if (_mesma_assinatura(existente['assinatura'], gab['assinatura'])
+                and _mesmas_marcas(existente['marcas'], gab['marcas'])):
+            return existente
+    gabaritos.append(gab)
+    salvar_gabarito(gab)
+    return gab
+
+# --- SIDECAR JSON DA ESTRUTURA ---
+
+def hash_arquivo(path):
+    """SHA-256 do arquivo (lido em blocos)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+def _rect_json(rect):
+    """Retângulo em pontos e em mm"""
+    pt = [round(v, 3) for v in rect]
+    return {'pt': pt, 'mm': [round(v / MM_TO_PT, 2) for v in pt]}
+
+def _confianca_estrutura(estrutura, estrategia=ESTRATEGIA_MARCAS):
+    """
+    Confiança (0 a 1) na estrutura detectada, por coerência:
+    - capa e 4ª capa presentes e com larguras parecidas;
+    - lombada estreita em relação aos painéis;
+    - orelhas, se houver, com larguras parecidas entre si;
+    - lombada coerente com a prevista pelo número de páginas (se houver).
+    """
+    larg = {p: (c[1] - c[0]) for p, c in estrutura.items() if c}
+    if 'capa' not in larg or 'quarta_capa' not in larg or 'lombada' not in larg:
+        return 0.0
+    notas = []
+    capa, quarta = larg['capa'], larg['quarta_capa']
+    notas.append(1 - abs(capa - quarta) / max(capa, quarta))
+    notas.append(1.0 if larg['lombada'] < min(capa, quarta) * 0.5 else 0.3)
+    if 'orelha_esq' in larg and 'orelha_dir' in larg:
+        oe, od = larg['orelha_esq'], larg['orelha_dir']
+        notas.append(1 - abs(oe - od) / max(oe, od))
+    elif 'orelha_esq' in larg or 'orelha_dir' in larg:
+        notas.append(0.5)
+    if estrategia == ESTRATEGIA_DIVERGENTE:
+        notas.append(0.4)
+    elif estrategia == ESTRATEGIA_PREVISTA_CENTRO:
+        notas.append(0.6)
+    return round(max(0.0, min(notas)), 3)
+
+def montar_sidecar(pdf_path, hash_capa, trimbox, colunas, estrutura, estrategia, lombada_prevista_mm=None,
+                   pagina=0):
+    """Estrutura completa da capa (painéis em pt e mm, trimbox, estratégia e confiança)"""
+    paineis = {}
+    for parte, coords in estrutura.items():
+        if coords:
+            x0, x1 = coords
+            rect = fitz.Rect(x0, trimbox.y0, x1, trimbox.y1)
+            paineis[parte] = dict(_rect_json(rect), largura_mm=round((x1 - x0) / MM_TO_PT, 2))
+    return {
+        'versao': SIDECAR_VERSAO,
+        'arquivo': os.path.basename(pdf_path),
+        'hash': hash_capa,
+        'pagina': pagina,
+        'trimbox': _rect_json(trimbox),
+        'colunas_pt': [round(x, 3) for x in colunas],
+        'paineis': paineis,
+        'estrategia': estrategia,
+        'lombada_prevista_mm': round(lombada_prevista_mm, 2) if lombada_prevista_mm else None,
+        'confianca': _confianca_estrutura(estrutura, estrategia),
+    }
+
+def montar_sidecar_combinado(pdf_path, hash_capa, sidecars, lombada_prevista_mm=None):
+    """Sidecar de um PDF com várias páginas: o sidecar de cada página em 'paginas'"""
+    return {
+        'versao': SIDECAR_VERSAO,
+        'arquivo': os.path.basename(pdf_path),
+        'hash': hash_capa,
+        'lombada_prevista_mm': round(lombada_prevista_mm, 2) if lombada_prevista_mm else None,
+        'paginas': sidecars,
+        'confianca': min(sc['confianca'] for sc in sidecars),
+    }
+
+def salvar_sidecar(path_json, dados):
+    with open(path_json, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+
+def carregar_sidecar(path_json, hash_capa, lombada_prevista_mm=None):
+    """Sidecar salvo, se existir e corresponder ao arquivo atual da capa
+    (e à mesma lombada prevista); senão None"""
+    try:
+        with open(path_json, encoding="utf-8") as f:
+            dados = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if dados.get('versao') != SIDECAR_VERSAO or dados.get('hash') != hash_capa:
+        return None
+    prevista = round(lombada_prevista_mm, 2) if lombada_prevista_mm else None
+    if dados.get('lombada_prevista_mm') != prevista:
+        return None
+    return dados
+
+def _estrutura_do_sidecar(dados):
+    """Sidecar -> (trimbox, estrutura no formato de _identificar_estrutura)"""
+    trimbox = fitz.Rect(dados['trimbox']['pt'])
+    estrutura = {p: None for p in PARTES}
+    for parte, painel in dados['paineis'].items():
+        x0, _, x1, _ = painel['pt']
+        estrutura[parte] = (x0, x1)
+    return trimbox, estrutura
+
+def _detectar_pagina(page, pdf_path, pagina, hash_capa, isbn, prevista, paginas_miolo):
+    """
+    Detecta a estrutura de uma página (gabarito ou marcas de corte). Não
+    grava o índice: o gabarito novo volta para o processo principal.
+
+    Returns:
+        tuple: (sidecar da página ou None se as marcas não forem encontradas,
+                gabarito novo a registrar ou None)
+    """
+    # Obtém TrimBox para altura
+    trimbox = page.trimbox
+    gabaritos = carregar_gabaritos() if GABARITOS_ATIVO else []
+    achado = buscar_gabarito(page, trimbox, gabaritos) if gabaritos else None
+    
+    if achado:
+        # Mesma gráfica/série: estrutura do gabarito, marcas conferidas
+        gab, estrutura, colunas = achado
+        estrategia = ESTRATEGIA_GABARITO
+        print(f"   -> Estrutura do gabarito {gab['id']} (origem {gab.get('origem')}), marcas verificadas")
+        if prevista:
+            lombada_mm = (estrutura['lombada'][1] - estrutura['lombada'][0]) / MM_TO_PT
+            if abs(lombada_mm - prevista) > _tolerancia_lombada(prevista):
+                estrategia = ESTRATEGIA_DIVERGENTE
+                print(f"   [AVISO] Lombada detectada difere da prevista ({prevista:.1f}mm para {paginas_miolo} págs).")
+    else:
+        # Detecta marcas de corte
+        colunas = _detectar_marcas_corte(page)
+        
+        if not colunas:
+            return None, None
+        
+        # Identifica estrutura (com a lombada prevista, se houver)
+        estrutura, estrategia = _identificar_estrutura(colunas, trimbox, prevista)
+        if estrategia == ESTRATEGIA_DIVERGENTE:
+            print(f"   [AVISO] Lombada detectada difere da prevista ({prevista:.1f}mm para {paginas_miolo} págs).")
+        elif estrategia == ESTRATEGIA_PREVISTA_CENTRO:
+            print(f"   [AVISO] Marcas da lombada ausentes: usando a largura prevista ({prevista:.1f}mm).")
+    
+    sidecar = montar_sidecar(pdf_path, hash_capa, trimbox, colunas, estrutura, estrategia, prevista, pagina)
+    
+    # Estrutura confiável e resolvida do zero: candidata ao índice de gabaritos
+    gabarito = None
+    if GABARITOS_ATIVO and not achado and sidecar['confianca'] >= GABARITO_CONFIANCA_MINIMA:
+        gabarito = novo_gabarito(page, trimbox, colunas, estrutura, isbn)
+    return sidecar, gabarito
+
+def _nomes_saida(isbn, pagina, formato):
+    """Nomes dos arquivos de cada painel; da 2ª página em diante com sufixo _p{n}"""
+    prefixo = isbn if pagina == 0 else f"{isbn}_p{pagina + 1}"
+    return {
+        'capa': f"{prefixo}_capa.{formato}",
+        'quarta_capa': f"{prefixo}_quartacapa.{formato}",
+        'lombada': f"{prefixo}_lombada.{formato}",
+        'orelha_esq': f"{prefixo}_orelha_esq.{formato}",
+        'orelha_dir': f"{prefixo}_orelha_dir.{formato}"
+    }
 
-def processar_capa(pdf_path, output_folder, isbn, dpi=300, apenas_capa_quarta=True):
+def _processar_pagina(pdf_path, pagina, output_folder, isbn, dpi, partes_exportar, formato,
+                      hash_capa, prevista, paginas_miolo, sidecar=None):
+    """
+    Detecta (ou reaproveita do sidecar) a estrutura de uma página e exporta
+    os painéis. Abre o próprio handle do PDF: pode rodar num worker.
+
+    Returns:
+        tuple: (sidecar da página ou None, {parte: caminho}, {parte: largura_mm},
+                gabarito novo ou None)
+    """
+    doc = abrir_pdf(pdf_path)
+    try:
+        page = doc[pagina]
+        gabarito = None
+        if sidecar is None:
+            sidecar, gabarito = _detectar_pagina(page, pdf_path, pagina, hash_capa, isbn, prevista, paginas_miolo)
+            if sidecar is None:
+                print(f"   [AVISO] Marcas de corte não detectadas em {pdf_path} (página {pagina + 1})")
+                return None, {}, {}, None
+        trimbox, estrutura = _estrutura_do_sidecar(sidecar)
+        
+        nomes = _nomes_saida(isbn, pagina, formato)
+        caminhos = {}
+        larguras = {}
+        for parte, coords in estrutura.items():
+            if coords:
+                x0, x1 = coords
+                larguras[parte] = (x1 - x0) / MM_TO_PT
+                
+                # Só exporta se estiver na lista
+                if parte in partes_exportar:
+                    rect = fitz.Rect(x0, trimbox.y0, x1, trimbox.y1)
+                    caminho = os.path.join(output_folder, nomes[parte])
+                    with aplicar_perfil('final'):
+                        if formato != "png" or precisa_faixas(rect, dpi):
+                            # Memória limitada, independente do DPI
+                            salvar_em_faixas(page, caminho, dpi, clip=rect)
+                        else:
+                            salvar_png(page, caminho, dpi, clip=rect)
+                    caminhos[parte] = caminho
+        return sidecar, caminhos, larguras, gabarito
+    finally:
+        doc.close()
+
+def _processar_pagina_worker(args):
+    return _processar_pagina(*args)
+
+def processar_capa(pdf_path, output_folder, isbn, dpi=300, apenas_capa_quarta=True,
+                   paginas_miolo=None, papel=PAPEL_PADRAO, formato="png", max_workers=None):
     """
     Processa um PDF de capa e exporta as imagens.
     
@@ -151,6 +693,14 @@ def processar_capa(pdf_path, output_folder, isbn, dpi=300, apenas_capa_quarta=Tr
         dpi: Resolução das imagens (padrão 300)
         apenas_capa_quarta: Se True, exporta apenas capa e 4ª capa (padrão)
                            Se False, exporta todos (lombada, orelhas também)
+        paginas_miolo: Nº de páginas do miolo; se informado, a largura prevista
+                       da lombada é usada para validar/guiar a detecção
+        papel: Papel do miolo (chave de PAPEIS_ESPESSURA_MM)
+        formato: "png" ou "tif". Imagens grandes (ex.: 600 DPI) e TIFF são
+                 renderizadas em faixas, sem montar a imagem inteira na memória
+        max_workers: Processos para PDFs com várias páginas (1 = em série).
+                     None = CAPA_MAX_WORKERS, ou em série se já estiver
+                     rodando dentro de um worker (lote, nó local)
     
     Returns:
         dict com caminhos dos arquivos gerados:
@@ -160,6 +710,19 @@ def processar_capa(pdf_path, output_folder, isbn, dpi=300, apenas_capa_quarta=Tr
         - 'orelha_esq': caminho do PNG da orelha esquerda (se apenas_capa_quarta=False)
         - 'orelha_dir': caminho do PNG da orelha direita (se apenas_capa_quarta=False)
         - 'estrutura': dict com as medidas em mm
+        - 'sidecar': caminho do {isbn}_estrutura.json
+        - 'paginas': lista com caminhos e medidas de cada página do PDF
+
+    A estrutura completa é gravada em {isbn}_estrutura.json na pasta de
+    saída. Se esse arquivo já existir e o hash bater com o da capa, a
+    detecção é pulada e a estrutura salva é reaproveitada. Capas com a
+    geometria de um gabarito conhecido (GABARITOS_PASTA) usam a estrutura
+    do gabarito se as marcas previstas forem encontradas.
+
+    PDFs com várias páginas (sobrecapas, box) têm cada página detectada e
+    exportada num worker (em série quando a própria capa já roda num worker). As chaves do topo do resultado são as da 1ª
+    página; as demais saem com sufixo ({isbn}_p2_capa.png, ...) e o sidecar
+    combinado traz a estrutura de todas em 'paginas'.
     """
     resultado = {
         'capa': None,
@@ -167,7 +730,9 @@ def processar_capa(pdf_path, output_folder, isbn, dpi=300, apenas_capa_quarta=Tr
         'lombada': None,
         'orelha_esq': None,
         'orelha_dir': None,
-        'estrutura': {}
+        'estrutura': {},
+        'sidecar': None,
+        'paginas': []
     }
     
     if not os.path.exists(pdf_path):
@@ -175,24 +740,22 @@ def processar_capa(pdf_path, output_folder, isbn, dpi=300, apenas_capa_quarta=Tr
         return resultado
     
     try:
-        doc = fitz.open(pdf_path)
-        page = doc[0]
-        
-        # Obtém TrimBox para altura
-        trimbox = page.trimbox
-        y_top = trimbox.y0
-        y_bottom = trimbox.y1
+        hash_capa = hash_arquivo(pdf_path)
+        path_sidecar = os.path.join(output_folder, f"{isbn}_estrutura.json")
+        prevista = largura_lombada_prevista(paginas_miolo, papel) if paginas_miolo else None
+        salvo = carregar_sidecar(path_sidecar, hash_capa, prevista)
         
-        # Detecta marcas de corte
-        colunas = _detectar_marcas_corte(page)
-        
-        if not colunas:
-            print(f"   [AVISO] Marcas de corte não detectadas em {pdf_path}")
-            doc.close()
-            return resultado
+        doc = abrir_pdf(pdf_path)
+        total = len(doc)
+        doc.close()
         
-        # Identifica estrutura
-        estrutura = _identificar_estrutura(colunas, trimbox)
+        # Sidecar de página única ou combinado (várias páginas)
+        salvos = [None] * total
+        if salvo:
+            print(f"   -> Estrutura reaproveitada de {os.path.basename(path_sidecar)}")
+            for dados in salvo.get('paginas', [salvo]):
+                if dados.get('pagina', 0) < total:
+                    salvos[dados.get('pagina', 0)] = dados
         
         # Define quais partes exportar
         if apenas_capa_quarta:
@@ -200,30 +763,48 @@ def processar_capa(pdf_path, output_folder, isbn, dpi=300, apenas_capa_quarta=Tr
         else:
             partes_exportar = ['capa', 'quarta_capa', 'lombada', 'orelha_esq', 'orelha_dir']
         
-        nomes = {
-            'capa': f"{isbn}_capa.png",
-            'quarta_capa': f"{isbn}_quartacapa.png",
-            'lombada': f"{isbn}_lombada.png",
-            'orelha_esq': f"{isbn}_orelha_esq.png",
-            'orelha_dir': f"{isbn}_orelha_dir.png"
-        }
+        tarefas = [
+            (pdf_path, pagina, output_folder, isbn, dpi, partes_exportar, formato,
+             hash_capa, prevista, paginas_miolo, salvos[pagina])
+            for pagina in range(total)
+        ]
+        if max_workers is None:
+            # Dentro de um worker do lote, um pool próprio disputaria as CPUs
+            # e escaparia do controle de memória do memoria.py
+            max_workers = 1 if multiprocessing.parent_process() else CAPA_MAX_WORKERS
+        workers = min(max_workers, os.cpu_count() or 1, total)
+        if workers <= 1:
+            saidas = [_processar_pagina(*tarefa) for tarefa in tarefas]
+        else:
+            # Uma página por worker: o tempo total fica perto do da página mais lenta
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                saidas = list(pool.map(_processar_pagina_worker, tarefas))
         
-        for parte, coords in estrutura.items():
-            if coords:
-                x0, x1 = coords
-                largura_mm = (x1 - x0) / MM_TO_PT
-                resultado['estrutura'][parte] = largura_mm
-                
-                # Só exporta se estiver na lista
-                if parte in partes_exportar:
-                    rect = fitz.Rect(x0, y_top, x1, y_bottom)
-                    pix = page.get_pixmap(clip=rect, dpi=dpi)
-                    
-                    caminho = os.path.join(output_folder, nomes[parte])
-                    pix.save(caminho)
-                    resultado[parte] = caminho
+        # Gabaritos novos gravados aqui, depois de todas as páginas
+        novos = [gab for _, _, _, gab in saidas if gab]
+        if novos:
+            gabaritos = carregar_gabaritos()
+            for gab in novos:
+                registrar_gabarito(gabaritos, gab)
         
-        doc.close()
+        sidecars = [sc for sc, _, _, _ in saidas if sc]
+        if not sidecars:
+            return resultado
+        
+        if not salvo or len(sidecars) != len(salvo.get('paginas', [salvo])):
+            if total == 1:
+                salvar_sidecar(path_sidecar, sidecars[0])
+            else:
+                salvar_sidecar(path_sidecar, montar_sidecar_combinado(pdf_path, hash_capa, sidecars, prevista))
+        resultado['sidecar'] = path_sidecar
+        
+        for pagina, (sc, caminhos, larguras, _) in enumerate(saidas):
+            resultado['paginas'].append(dict(caminhos, pagina=pagina, estrutura=larguras))
+        
+        # Topo do resultado: 1ª página (compatível com capas de página única)
+        _, caminhos, larguras, _ = saidas[0]
+        resultado.update(caminhos)
+        resultado['estrutura'] = larguras
         
         # Log apenas para itens exportados
         if resultado['capa']:
@@ -233,6 +814,10 @@ def processar_capa(pdf_path, output_folder, isbn, dpi=300, apenas_capa_quarta=Tr
         if not apenas_capa_quarta:
             if resultado['lombada']:
                 print(f"   [OK] Lombada exportada ({resultado['estrutura'].get('lombada', 0):.1f}mm)")
+        for item in resultado['paginas'][1:]:
+            if item.get('capa') or item.get('quarta_capa'):
+                print(f"   [OK] Página {item['pagina'] + 1}: {len(item['estrutura'])} painéis "
+                      f"(capa {item['estrutura'].get('capa', 0):.1f}mm)")
         
     except Exception as e:
         print(f"   [ERRO] Falha ao processar capa: {e}")
@@ -9,6 +9,8 @@ import fitz
 import cv2
 import numpy as np
 
+from perfis_render import renderizar_perfil
+
 INPUT_DIR = "./entrada"
 OUTPUT_DIR = "./saida_detector_v3"
 MM_TO_PT = 2.83465
@@ -145,7 +147,7 @@ def identificar_estrutura(colunas, trimbox, page_width):
 
 def gerar_debug(page, estrutura, y_top, y_bottom, path_out):
     """Gera imagem de debug com retângulos coloridos"""
-    pix = page.get_pixmap(dpi=150)
+    pix = renderizar_perfil(page, 'preview')
     img_data = np.frombuffer(pix.samples, dtype=np.uint8).copy()
     img = img_data.reshape(pix.h, pix.w, pix.n)
     if pix.n >= 4:
@@ -234,7 +236,7 @@ def main():
         if coords:
             x0, x1 = coords
             rect = fitz.Rect(x0, y_top, x1, y_bottom)
-            pix = page.get_pixmap(clip=rect, dpi=300)
+            pix = renderizar_perfil(page, 'final', clip=rect)
             pix.save(os.path.join(OUTPUT_DIR, f"_{nome}.png"))
             print(f"\n[EXPORTADO] _{nome}.png")
     
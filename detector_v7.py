@@ -8,6 +8,8 @@ import fitz
 import cv2
 import numpy as np
 
+from perfis_render import renderizar_perfil
+
 INPUT_DIR = "./entrada"
 OUTPUT_DIR = "./saida_detector_v7"
 MM_TO_PT = 2.83465
@@ -171,7 +173,7 @@ def identificar_estrutura(colunas, trimbox):
     return resultado
 
 def gerar_debug(page, estrutura, y_top, y_bottom, colunas, path_out):
-    pix = page.get_pixmap(dpi=150)
+    pix = renderizar_perfil(page, 'preview')
     img_data = np.frombuffer(pix.samples, dtype=np.uint8).copy()
     img = img_data.reshape(pix.h, pix.w, pix.n)
     if pix.n >= 4:
@@ -249,7 +251,7 @@ def main():
         if coords:
             x0, x1 = coords
             rect = fitz.Rect(x0, y_top, x1, y_bottom)
-            page.get_pixmap(clip=rect, dpi=300).save(os.path.join(OUTPUT_DIR, f"_{nome}.png"))
+            renderizar_perfil(page, 'final', clip=rect).save(os.path.join(OUTPUT_DIR, f"_{nome}.png"))
             print(f"[EXPORTADO] _{nome}.png")
     
     gerar_debug(page, estrutura, y_top, y_bottom, colunas, os.path.join(OUTPUT_DIR, "DEBUG_V7.png"))
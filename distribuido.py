@@ -0,0 +1,389 @@
+"""
+Distribuído - Módulo
+--------------------
+Execução do pipeline em várias máquinas que apontam para as mesmas pastas
+entrada/ e saida/ (NFS). Cada livro é reivindicado por um nó através de um
+arquivo de lease em saida/_leases/:
+
+- {isbn}.lock: criado com O_CREAT|O_EXCL (atômico, só um nó consegue).
+  Enquanto processa, o nó renova o mtime do arquivo (heartbeat).
+- Lease sem heartbeat há mais de LEASE_EXPIRA_S segundos é de um nó que
+  caiu: o nó que criar a marca {isbn}.lock.recupera-{token} (O_EXCL, só
+  um vence) confere o dono de novo e troca o lock pelo seu (os.replace).
+  A idade do lease é medida no relógio do servidor de arquivos (mtime de
+  um arquivo tocado na pasta), não no relógio local: diferença de relógio
+  entre as máquinas não rouba leases vivos.
+- {isbn}.feito: gravado de forma atômica ao terminar (status, nó, tempo).
+  Livros que terminaram com erro só são refeitos com --refazer-erros.
+
+Os livros são reivindicados do mais caro para o mais barato (LPT, pela
+estimativa do estimativa.py). O progresso agregado (feitos, em andamento
+por nó, expirados, pendentes) e, no fim, o makespan previsto x real são
+lidos só desses arquivos, de qualquer máquina.
+
+Uso:
+    python distribuido.py                      # um nó nesta máquina
+    python distribuido.py --workers 4          # 4 nós locais (processos)
+    python distribuido.py --etapas capa,ensaio
+    python distribuido.py --refazer-erros      # refaz os livros que terminaram com erro
+    python distribuido.py --progresso          # só mostra o progresso
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import argparse
+import threading
+import multiprocessing
+
+from script_packshot import (
+    INPUT_DIR, OUTPUT_DIR, ETAPAS, garantir_pasta, encontrar_isbns, processar_livro
+)
+from estimativa import estimar_custos, ordenar_lpt, relatorio_makespan
+from arquivos_entrada import indexar_arquivos
+
+# --- CONFIGURAÇÕES DO LEASE ---
+LEASE_PASTA = "_leases"
+
+# Lease sem heartbeat há mais que isso é considerado de um nó que caiu
+LEASE_EXPIRA_S = 120
+
+# Intervalo entre heartbeats (bem menor que LEASE_EXPIRA_S)
+LEASE_HEARTBEAT_S = 15
+
+# Espera quando não há livro livre mas ainda há leases ativos de outros nós
+LEASE_ESPERA_S = 5
+
+# De quanto em quanto tempo a diferença para o relógio do servidor é remedida
+LEASE_RELOGIO_S = 60
+
+# Diferença (s) relógio do servidor - relógio local, por pasta: (diferença, medida em)
+_relogios = {}
+
+def nome_no():
+    """Identificação do nó: máquina + pid"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def _pasta_leases(output_dir):
+    return os.path.join(output_dir, LEASE_PASTA)
+
+def _ler_json(caminho):
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _gravar_json_atomico(caminho, dados):
+    tmp = f"{caminho}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dados, f)
+    os.replace(tmp, caminho)
+
+def _criar_lock(caminho, no):
+    """Cria o lock de forma atômica; retorna o token ou None se já existir"""
+    token = uuid.uuid4().hex
+    try:
+        fd = os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return None
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({'no': no, 'token': token, 'inicio': time.time()}, f)
+    return token
+
+def _agora_servidor(pasta):
+    """
+    Hora atual no relógio do servidor de arquivos: toca um arquivo da pasta
+    (utime sem horário usa a hora do servidor no NFS) e lê o mtime. A
+    diferença para o relógio local é guardada por LEASE_RELOGIO_S.
+    """
+    diferenca, medida = _relogios.get(pasta, (None, 0))
+    if diferenca is None or time.monotonic() - medida > LEASE_RELOGIO_S:
+        relogio = os.path.join(pasta, f".relogio-{nome_no()}-{uuid.uuid4().hex}")
+        try:
+            with open(relogio, "a"):
+                pass
+            os.utime(relogio)
+            diferenca = os.path.getmtime(relogio) - time.time()
+        except OSError:
+            diferenca = 0.0
+        finally:
+            try:
+                os.remove(relogio)
+            except OSError:
+                pass
+        _relogios[pasta] = (diferenca, time.monotonic())
+    return time.time() + diferenca
+
+def _lock_expirado(caminho):
+    try:
+        idade = _agora_servidor(os.path.dirname(caminho)) - os.path.getmtime(caminho)
+    except OSError:
+        return False
+    return idade > LEASE_EXPIRA_S
+
+def _recuperar_expirado(caminho, no):
+    """
+    Toma um lock expirado de forma atômica. Só um nó consegue criar a marca
+    {lock}.recupera-{token antigo} (O_EXCL); esse nó confere de novo dono e
+    expiração e troca o lock pelo seu num os.replace. Um lock vivo nunca é
+    movido, e quem perde a marca desiste.
+
+    Returns:
+        tuple: (dados do lock recuperado, token novo), ou None
+    """
+    antigo = _ler_json(caminho)
+    if not antigo or not _lock_expirado(caminho):
+        return None
+    marca = f"{caminho}.recupera-{antigo.get('token')}"
+    try:
+        os.close(os.open(marca, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        # Outro nó está recuperando este mesmo lease
+        return None
+    try:
+        atual = _ler_json(caminho)
+        if not atual or atual.get('token') != antigo.get('token') or not _lock_expirado(caminho):
+            # Já foi recuperado (e a marca apagada) ou o dono voltou
+            return None
+        token = uuid.uuid4().hex
+        _gravar_json_atomico(caminho, {'no': no, 'token': token, 'inicio': time.time()})
+        return antigo, token
+    finally:
+        try:
+            os.remove(marca)
+        except OSError:
+            pass
+
+def livro_feito(output_dir, isbn, refazer_erros_antes=None):
+    """
+    True se o livro já tem {isbn}.feito. Com refazer_erros_antes (timestamp),
+    um .feito com erro terminado antes disso não conta: o livro é refeito.
+    """
+    caminho = os.path.join(_pasta_leases(output_dir), f"{isbn}.feito")
+    if refazer_erros_antes is None:
+        return os.path.exists(caminho)
+    feito = _ler_json(caminho)
+    if not feito:
+        return os.path.exists(caminho)
+    return feito.get('status') == 'ok' or feito.get('fim', 0) >= refazer_erros_antes
+
+def reivindicar(output_dir, isbn, no, refazer_erros_antes=None):
+    """
+    Tenta reivindicar o livro para este nó.
+
+    Returns:
+        str: token do lease, ou None (já feito ou com lease ativo de outro nó)
+    """
+    pasta = _pasta_leases(output_dir)
+    if livro_feito(output_dir, isbn, refazer_erros_antes):
+        return None
+    caminho = os.path.join(pasta, f"{isbn}.lock")
+    token = _criar_lock(caminho, no)
+    if token:
+        return token
+    recuperado = _recuperar_expirado(caminho, no)
+    if recuperado:
+        antigo, token = recuperado
+        print(f"   [AVISO] {isbn}: lease expirado de {antigo.get('no')} recuperado por {no}.")
+        return token
+    return None
+
+def _heartbeat(caminho, token, parar, estado):
+    """Renova o mtime do lock até 'parar'; marca estado['perdido'] se o lease mudar de dono"""
+    while not parar.wait(LEASE_HEARTBEAT_S):
+        dados = _ler_json(caminho)
+        if not dados or dados.get('token') != token:
+            estado['perdido'] = True
+            return
+        try:
+            os.utime(caminho)
+        except OSError:
+            estado['perdido'] = True
+            return
+
+def concluir(output_dir, isbn, no, token, status, tempo, custo=None):
+    """Grava o {isbn}.feito e libera o lock (se ainda for deste nó)"""
+    pasta = _pasta_leases(output_dir)
+    _gravar_json_atomico(os.path.join(pasta, f"{isbn}.feito"), {
+        'no': no, 'status': status, 'tempo': round(tempo, 2), 'fim': time.time(),
+        'custo': round(custo, 2) if custo is not None else None
+    })
+    caminho = os.path.join(pasta, f"{isbn}.lock")
+    dados = _ler_json(caminho)
+    if dados and dados.get('token') == token:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+def processar_com_lease(isbn, indice, etapas, input_dir, output_dir, no, token, custo=None):
+    """Processa um livro mantendo o heartbeat do lease; retorna o status"""
+    caminho = os.path.join(_pasta_leases(output_dir), f"{isbn}.lock")
+    parar = threading.Event()
+    estado = {'perdido': False}
+    batimento = threading.Thread(target=_heartbeat, args=(caminho, token, parar, estado), daemon=True)
+    batimento.start()
+    inicio = time.perf_counter()
+    try:
+        processar_livro(isbn, indice, etapas, None, input_dir, output_dir)
+        status = 'ok'
+    except Exception as e:
+        print(f"   [ERRO] {isbn}: {e}")
+        status = 'erro'
+    finally:
+        parar.set()
+        batimento.join()
+    if estado['perdido']:
+        print(f"   [AVISO] {isbn}: lease perdido durante o processamento (outro nó pode ter refeito).")
+    concluir(output_dir, isbn, no, token, status, time.perf_counter() - inicio, custo)
+    return status
+
+def progresso(output_dir, isbns):
+    """
+    Progresso agregado de todos os nós.
+
+    Returns:
+        dict: total, feitos, erros, em_andamento ({isbn: nó}), expirados,
+              pendentes e por_no ({nó: livros concluídos})
+    """
+    pasta = _pasta_leases(output_dir)
+    resumo = {'total': len(isbns), 'feitos': 0, 'erros': 0, 'em_andamento': {},
+              'expirados': 0, 'pendentes': 0, 'por_no': {}}
+    for isbn in isbns:
+        feito = _ler_json(os.path.join(pasta, f"{isbn}.feito"))
+        if feito:
+            resumo['feitos'] += 1
+            if feito.get('status') != 'ok':
+                resumo['erros'] += 1
+            resumo['por_no'][feito.get('no')] = resumo['por_no'].get(feito.get('no'), 0) + 1
+            continue
+        caminho = os.path.join(pasta, f"{isbn}.lock")
+        lock = _ler_json(caminho)
+        if lock and not _lock_expirado(caminho):
+            resumo['em_andamento'][isbn] = lock.get('no')
+        elif lock:
+            resumo['expirados'] += 1
+        else:
+            resumo['pendentes'] += 1
+    return resumo
+
+def relatorio_lote(output_dir, isbns):
+    """Makespan previsto (LPT, nº de nós que trabalharam) x real, pelos .feito"""
+    pasta = _pasta_leases(output_dir)
+    feitos = [(i, _ler_json(os.path.join(pasta, f"{i}.feito"))) for i in isbns]
+    feitos = [(i, f) for i, f in feitos if f and f.get('custo') is not None]
+    if not feitos:
+        return
+    custos = {i: f['custo'] for i, f in feitos}
+    tempos = {i: f['tempo'] for i, f in feitos}
+    real = max(f['fim'] for _, f in feitos) - min(f['fim'] - f['tempo'] for _, f in feitos)
+    nos = len({f['no'] for _, f in feitos})
+    relatorio_makespan(custos, tempos, nos, real)
+
+def imprimir_progresso(resumo):
+    print(f"--- PROGRESSO: {resumo['feitos']}/{resumo['total']} feitos "
+          f"({resumo['erros']} com erro), {len(resumo['em_andamento'])} em andamento, "
+          f"{resumo['expirados']} expirados, {resumo['pendentes']} pendentes ---")
+    for no, qtd in sorted(resumo['por_no'].items()):
+        print(f"   {no}: {qtd} livro(s)")
+    for isbn, no in sorted(resumo['em_andamento'].items()):
+        print(f"   -> {isbn} em {no}")
+
+def executar_no(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR, etapas=ETAPAS, no=None, refazer_erros=False):
+    """
+    Loop de um nó: reivindica e processa livros até não restar nenhum
+    pendente nem lease ativo (leases que expirarem são recuperados).
+
+    A lista de livros e as estimativas são calculadas uma vez; depois, só o
+    .feito/lock do candidato da vez é consultado.
+
+    Args:
+        refazer_erros: Refaz os livros cujo .feito terminou com erro
+
+    Returns:
+        int: livros processados por este nó
+    """
+    no = no or nome_no()
+    garantir_pasta(output_dir)
+    os.makedirs(_pasta_leases(output_dir), exist_ok=True)
+    # Erros anteriores a esta execução voltam para a fila
+    refazer_antes = time.time() if refazer_erros else None
+
+    arquivos = os.listdir(input_dir)
+    isbns = sorted(encontrar_isbns(arquivos, etapas))
+    indice = indexar_arquivos(arquivos, input_dir)
+    # Estima só os que ainda não foram feitos; maiores primeiro (LPT)
+    abertos = [i for i in isbns if not livro_feito(output_dir, i, refazer_antes)]
+    custos = estimar_custos(abertos, indice, etapas)
+    restantes = ordenar_lpt(custos)
+
+    processados = 0
+    while restantes:
+        reivindicou = False
+        for isbn in list(restantes):
+            if livro_feito(output_dir, isbn, refazer_antes):
+                # Feito por outro nó
+                restantes.remove(isbn)
+                continue
+            token = reivindicar(output_dir, isbn, no, refazer_antes)
+            if not token:
+                # Lease ativo de outro nó: fica na lista até terminar ou expirar
+                continue
+            reivindicou = True
+            restantes.remove(isbn)
+            processar_com_lease(isbn, indice, etapas, input_dir, output_dir, no, token, custos[isbn])
+            processados += 1
+            # Volta ao topo: livros maiores podem ter sido liberados (leases expirados)
+            break
+
+        if not reivindicou and restantes:
+            # Só restam livros com outros nós: espera terminarem ou expirarem
+            time.sleep(LEASE_ESPERA_S)
+    print(f"   [OK] Nó {no}: {processados} livro(s) processado(s).")
+    return processados
+
+def _executar_no_local(args):
+    input_dir, output_dir, etapas, refazer_erros = args
+    executar_no(input_dir, output_dir, etapas, refazer_erros=refazer_erros)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline de packshot distribuído (pastas compartilhadas).")
+    parser.add_argument('--entrada', default=INPUT_DIR)
+    parser.add_argument('--saida', default=OUTPUT_DIR)
+    parser.add_argument('--etapas', default=",".join(ETAPAS))
+    parser.add_argument('--workers', type=int, default=1, help="Nós locais (processos) nesta máquina")
+    parser.add_argument('--refazer-erros', action='store_true', help="Refaz os livros que terminaram com erro")
+    parser.add_argument('--progresso', action='store_true', help="Só mostra o progresso agregado")
+    args = parser.parse_args()
+    etapas = [e.strip() for e in args.etapas.split(',') if e.strip()]
+    invalidas = [e for e in etapas if e not in ETAPAS]
+    if invalidas or not etapas:
+        parser.error(f"etapa(s) inválida(s): {', '.join(invalidas) or '(nenhuma)'}; use {', '.join(ETAPAS)}")
+
+    if args.progresso:
+        isbns = sorted(encontrar_isbns(os.listdir(args.entrada), etapas))
+        resumo = progresso(args.saida, isbns)
+        imprimir_progresso(resumo)
+        if resumo['feitos'] == resumo['total']:
+            relatorio_lote(args.saida, isbns)
+        return
+
+    if args.workers <= 1:
+        executar_no(args.entrada, args.saida, etapas, refazer_erros=args.refazer_erros)
+    else:
+        nos = [
+            multiprocessing.Process(target=_executar_no_local, args=((args.entrada, args.saida, etapas, args.refazer_erros),))
+            for _ in range(args.workers)
+        ]
+        for p in nos:
+            p.start()
+        for p in nos:
+            p.join()
+    isbns = sorted(encontrar_isbns(os.listdir(args.entrada), etapas))
+    imprimir_progresso(progresso(args.saida, isbns))
+    relatorio_lote(args.saida, isbns)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Ensaio Web - Módulo
+-------------------
+Perfil de saída do _ensaiodeleitura.pdf para a loja: arquivo pequeno e
+primeira página rápida no visualizador.
+
+- Imagens acima de ENSAIO_DPI_LIMIAR são reduzidas para perto de
+  ENSAIO_DPI_ALVO (o MuPDF reduz por fatores inteiros). As fotográficas (já
+  em JPEG/JPX) são recomprimidas em JPEG com ENSAIO_QUALIDADE_JPEG; as sem
+  perdas (traço, indexadas, Flate) continuam sem perdas: em JPEG borrariam.
+- Conteúdo e imagens CMYK convertidos para RGB (o que o navegador mostra).
+- Fontes reduzidas aos glifos usados (subset).
+- Salvo com limpeza de objetos, deflate e object streams. A linearização
+  (fast web view) é tentada, mas o MuPDF 1.26+ não a suporta mais: nesse
+  caso o arquivo sai sem ela, com object streams, e não é tentada de novo
+  no mesmo processo.
+
+Uso:
+    from ensaio_web import salvar_ensaio_web
+
+    salvar_ensaio_web(pdf_ensaio, caminho)
+"""
+import fitz
+
+# --- CONFIGURAÇÕES DO ENSAIO WEB ---
+# Resolução alvo das imagens e limiar a partir do qual são reduzidas
+ENSAIO_DPI_ALVO = 150
+ENSAIO_DPI_LIMIAR = 225
+
+# Qualidade JPEG das imagens recomprimidas (0-100)
+ENSAIO_QUALIDADE_JPEG = 75
+
+# Converte conteúdo e imagens para RGB
+ENSAIO_RGB = True
+
+# Tenta salvar linearizado (ignorado se o MuPDF não suportar)
+ENSAIO_LINEARIZAR = True
+
+# Vira True na primeira recusa do MuPDF: não tenta linearizar de novo
+_linearizacao_indisponivel = False
+
+# Erro do MuPDF ao pedir a linearização (1.26+); em versões antigas não ocorre
+_ERRO_LINEARIZACAO = getattr(getattr(fitz, "mupdf", None), "FzErrorArgument", RuntimeError)
+
+def _opcoes_imagens():
+    """
+    Opções do rewriter do MuPDF: todas as imagens acima do limiar são
+    reduzidas; as com perdas voltam em JPEG, as sem perdas (traço,
+    indexadas, Flate) voltam sem perdas. None se o PyMuPDF não tiver
+    FZ_RECOMPRESS_LOSSLESS.
+    """
+    mupdf = getattr(fitz, "mupdf", None)
+    if mupdf is None or not hasattr(mupdf, "FZ_RECOMPRESS_LOSSLESS"):
+        return None
+    opcoes = mupdf.PdfImageRewriterOptions()
+    qualidade = str(ENSAIO_QUALIDADE_JPEG)
+    metodos = {
+        'color_lossy': mupdf.FZ_RECOMPRESS_JPEG,
+        'gray_lossy': mupdf.FZ_RECOMPRESS_JPEG,
+        'color_lossless': mupdf.FZ_RECOMPRESS_LOSSLESS,
+        'gray_lossless': mupdf.FZ_RECOMPRESS_LOSSLESS,
+        'bitonal': mupdf.FZ_RECOMPRESS_FAX,
+    }
+    for tipo, metodo in metodos.items():
+        setattr(opcoes, f"{tipo}_image_recompress_method", metodo)
+        setattr(opcoes, f"{tipo}_image_recompress_quality", qualidade)
+        setattr(opcoes, f"{tipo}_image_subsample_method", mupdf.FZ_SUBSAMPLE_AVERAGE)
+        setattr(opcoes, f"{tipo}_image_subsample_threshold", ENSAIO_DPI_LIMIAR)
+        setattr(opcoes, f"{tipo}_image_subsample_to", ENSAIO_DPI_ALVO)
+    return opcoes
+
+def otimizar_para_web(doc):
+    """Converte para RGB, reduz/recomprime as imagens e faz subset das fontes (in-place)"""
+    if ENSAIO_RGB:
+        doc.recolor(3)
+    opcoes = _opcoes_imagens()
+    if opcoes is not None:
+        doc.rewrite_images(options=opcoes)
+    else:
+        # PyMuPDF sem recompressão sem perdas: só as imagens com perdas (em JPEG borrariam o traço)
+        doc.rewrite_images(dpi_threshold=ENSAIO_DPI_LIMIAR, dpi_target=ENSAIO_DPI_ALVO,
+                           quality=ENSAIO_QUALIDADE_JPEG, lossy=True, lossless=False)
+    try:
+        doc.subset_fonts()
+    except Exception as e:
+        # Versões antigas do PyMuPDF dependem do fontTools para o subset
+        print(f"   [AVISO] Subset de fontes indisponível: {e}")
+
+def salvar_ensaio_web(doc, caminho):
+    """
+    Otimiza o documento e salva compactado (linearizado, se possível).
+
+    Returns:
+        bool: True se o arquivo saiu linearizado
+    """
+    global _linearizacao_indisponivel
+    otimizar_para_web(doc)
+    if ENSAIO_LINEARIZAR and not _linearizacao_indisponivel:
+        try:
+            doc.save(caminho, garbage=3, clean=1, deflate=1, linear=1)
+            return True
+        except _ERRO_LINEARIZACAO as e:
+            if "lineari" not in str(e).lower():
+                raise
+            print(f"   [AVISO] Linearização indisponível ({e}); salvando com object streams.")
+            _linearizacao_indisponivel = True
+    doc.save(caminho, garbage=3, clean=1, deflate=1, use_objstms=1)
+    return False
@@ -0,0 +1,136 @@
+"""
+Estimativa - Módulo
+-------------------
+Estimativa barata do custo de cada livro, antes de começar o lote, para
+escalonar os maiores primeiro (LPT: longest processing time first).
+
+O custo usa só o que sai sem renderizar nada:
+- tamanho dos arquivos (miolo + capa);
+- número de páginas do miolo, lido do /Count da árvore de páginas
+  (catálogo -> /Pages), sem carregar as páginas;
+- densidade de caminhos vetoriais da capa (operadores m/l/c/v/y/re nos
+  content streams da página), que domina a detecção das marcas.
+
+Os coeficientes (segundos) ficam no topo do arquivo; o relatório do final
+compara o makespan previsto com o real e sugere um fator de ajuste.
+
+Uso:
+    from arquivos_entrada import indexar_arquivos
+    from estimativa import estimar_custos, ordenar_lpt, makespan_previsto
+
+    indice = indexar_arquivos(os.listdir(INPUT_DIR), INPUT_DIR)
+    custos = estimar_custos(isbns, indice, etapas)
+    ordem = ordenar_lpt(custos)
+    previsto = makespan_previsto(custos, workers)
+"""
+import os
+import re
+import heapq
+
+from leitura_pdf import abrir_pdf
+
+# --- COEFICIENTES DO CUSTO (segundos) ---
+CUSTO_BASE_S = 0.3
+CUSTO_S_POR_MB = 0.05
+CUSTO_S_POR_PAGINA = 0.004
+CUSTO_S_POR_MIL_CAMINHOS = 0.4
+# Capa exportada a 300 DPI: custo fixo de renderização
+CUSTO_CAPA_S = 2.0
+
+# Operadores de construção de caminho no content stream
+RE_OPERADOR_CAMINHO = re.compile(rb'(?<![^\s])(?:m|l|c|v|y|re)(?![^\s])')
+
+def paginas_pdf(pdf_path):
+    """Número de páginas pelo /Count da raiz da árvore de páginas (fallback: len(doc))"""
+    doc = abrir_pdf(pdf_path)
+    try:
+        tipo, valor = doc.xref_get_key(doc.pdf_catalog(), "Pages")
+        if tipo == 'xref':
+            tipo, count = doc.xref_get_key(int(valor.split()[0]), "Count")
+            if tipo == 'int':
+                return int(count)
+        return len(doc)
+    except Exception:
+        return len(doc)
+    finally:
+        doc.close()
+
+def caminhos_capa(pdf_path):
+    """Quantidade de operadores de caminho nos content streams da 1ª página"""
+    doc = abrir_pdf(pdf_path)
+    try:
+        if len(doc) == 0:
+            return 0
+        total = 0
+        for xref in doc[0].get_contents():
+            total += len(RE_OPERADOR_CAMINHO.findall(doc.xref_stream(xref) or b""))
+        return total
+    except Exception:
+        return 0
+    finally:
+        doc.close()
+
+def estimar_custo(path_miolo, path_capa, etapas):
+    """
+    Custo estimado (s) de um livro para as etapas selecionadas.
+
+    Returns:
+        dict: custo, mb, paginas, caminhos
+    """
+    etapas_miolo = [e for e in etapas if e != 'capa']
+    mb = 0.0
+    paginas = 0
+    caminhos = 0
+    custo = CUSTO_BASE_S
+    if etapas_miolo and path_miolo:
+        mb += os.path.getsize(path_miolo) / 1e6
+        paginas = paginas_pdf(path_miolo)
+        custo += paginas * CUSTO_S_POR_PAGINA
+    if 'capa' in etapas and path_capa:
+        mb += os.path.getsize(path_capa) / 1e6
+        caminhos = caminhos_capa(path_capa)
+        custo += CUSTO_CAPA_S + caminhos / 1000 * CUSTO_S_POR_MIL_CAMINHOS
+    custo += mb * CUSTO_S_POR_MB
+    return {'custo': custo, 'mb': mb, 'paginas': paginas, 'caminhos': caminhos}
+
+def estimar_custos(isbns, indice, etapas):
+    """
+    Custo estimado (s) de cada ISBN: {isbn: custo}
+
+    Args:
+        indice: {isbn: {'miolo', 'capa'}} (ver arquivos_entrada.indexar_arquivos)
+    """
+    custos = {}
+    for isbn in isbns:
+        livro = indice.get(isbn, {})
+        custos[isbn] = estimar_custo(livro.get('miolo'), livro.get('capa'), etapas)['custo']
+    return custos
+
+def ordenar_lpt(custos):
+    """ISBNs do mais caro para o mais barato"""
+    return sorted(custos, key=lambda isbn: (-custos[isbn], isbn))
+
+def makespan_previsto(custos, workers):
+    """Makespan da atribuição LPT (cada livro vai para o worker que fica livre primeiro)"""
+    cargas = [0.0] * max(1, workers)
+    for isbn in ordenar_lpt(custos):
+        heapq.heapreplace(cargas, cargas[0] + custos[isbn])
+    return max(cargas)
+
+def relatorio_makespan(custos, tempos, workers, real):
+    """
+    Imprime o makespan previsto x real e o fator de ajuste dos coeficientes.
+
+    Args:
+        custos: {isbn: custo estimado}
+        tempos: {isbn: tempo real do livro}
+        workers: nº de workers
+        real: makespan real (tempo de parede do lote)
+    """
+    previsto = makespan_previsto(custos, workers)
+    # Fator que levaria o total estimado ao total real (calibração dos coeficientes)
+    soma_est = sum(custos[i] for i in tempos if i in custos)
+    fator = sum(tempos.values()) / soma_est if soma_est else 0.0
+    print(f"   -> Makespan previsto (LPT, {workers} workers): {previsto:.1f}s | real: {real:.1f}s")
+    if fator:
+        print(f"   -> Previsto com ajuste x{fator:.2f}: {previsto * fator:.1f}s (multiplique os CUSTO_* por {fator:.2f})")
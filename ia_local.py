@@ -0,0 +1,377 @@
+"""
+IA Local - Módulo
+-----------------
+Cliente do LM Studio (API compatível com OpenAI) para limpar sumários
+não estruturados.
+
+- Compacta o texto (pontilhados e números de página) antes de enviar.
+- Respeita um orçamento de tokens: sumários grandes são divididos em
+  blocos e as respostas são unidas no final.
+- Usa streaming: a resposta é validada enquanto chega (formato e
+  tamanho) e lida até o [DONE]; uma resposta fora do formato ou grande
+  demais é interrompida na hora.
+
+- Modo em lote: vários sumários por requisição, com o mesmo prefixo
+  (SYSTEM_PROMPT) para o servidor reaproveitar o cache de prompt.
+
+Uso:
+    from ia_local import chamar_ia_local, chamar_ia_local_lote
+
+    html = chamar_ia_local(texto_sumario)
+    htmls = chamar_ia_local_lote({isbn: texto_sumario, ...})
+"""
+import re
+import json
+import math
+
+# --- CONFIGURAÇÕES DO LM STUDIO ---
+LOCAL_AI_URL = "http://localhost:1234/v1/chat/completions"
+AI_MODEL = "local-model"
+
+# Janela de contexto do modelo carregado e reserva para a resposta (tokens)
+IA_CONTEXTO_TOKENS = 8192
+IA_MAX_TOKENS_RESPOSTA = 2048
+IA_MARGEM_TOKENS = 256
+
+# Heurística de estimativa: caracteres por token (PT com tokenizers BPE)
+IA_CHARS_POR_TOKEN = 3.5
+
+# Timeout (s) para conectar e entre pedaços do streaming
+IA_TIMEOUT = (10, 120)
+
+# Limite de segurança do streaming: caracteres de resposta por linha do
+# sumário enviado (entradas curtas como "1 Solidão" viram ~30 caracteres
+# de HTML, "<b>Capítulo 1</b> - Solidão<br />") mais uma folga fixa
+IA_CHARS_POR_LINHA_RESPOSTA = 120
+IA_FOLGA_CHARS_RESPOSTA = 500
+
+# Modo em lote: quantos sumários no máximo por requisição
+IA_LOTE_MAX_LIVROS = 8
+
+# Pede ao servidor para reaproveitar o prefixo (SYSTEM_PROMPT) já processado
+# (llama.cpp/LM Studio; servidores que não conhecem o campo o ignoram)
+IA_CACHE_PROMPT = True
+
+ERRO_SUMARIO = "<p>Erro ao processar sumário.</p>"
+
+# Prompt para a IA (Sumário)
+SYSTEM_PROMPT = """
+Sua tarefa é receber um texto de sumário, enviado pelo usuário. O sumário poderá ou não ter tags html e você deve extrair apenas seções que sejam **partes** ou **capítulo de hierarquia principal** e passar para uma outra estrutura de tags. O Resultado final deverá ser em uma linha. Responda apenas o resultado.
+
+**Exemplo de entrada 1:**
+<p class="SUM_Cap"><span class="_Cap"><a class="TitNum_Cor" href="cap_001.xhtml">Capítulo I</a></span></p>
+<p class="SUM_Cap2"><strong class="Bold_Compressed"><a class="Tit" href="cap_001.xhtml">TENDÊNCIAS PARA A FORMAÇÃO MÉDICA NO SÉCULO XXI</a></strong></p>
+<p class="SUM_Autor">DANNIELLE FERNANDES GODOI, ALEXANDRE SIZILIO</p>
+<p class="SUM_Cap"><span class="_Cap"><a class="TitNum_Cor" href="cap_002.xhtml">Capítulo II</a></span></p>
+<p class="SUM_Cap2"><strong class="Bold_Compressed"><a class="Tit" href="cap_002.xhtml">O PAPEL DA MEDICINA DE FAMÍLIA E COMUNIDADE NA FORMAÇÃO DO MÉDICO</a></strong></p>
+
+**Exemplo de saída 1:**
+<p><b>Capítulo I</b> - TENDÊNCIAS PARA A FORMAÇÃO MÉDICA NO SÉCULO XXI<br /><b>Capítulo II</b> - O PAPEL DA MEDICINA DE FAMÍLIA E COMUNIDADE NA FORMAÇÃO DO MÉDICO</p>
+
+**Exemplo de entrada 2:**
+Introdução
+1 ◼ Solidão
+2 ◼ Vivendo com... o outro
+
+**Exemplo de saída 2:**
+<p><b>Capítulo 1</b> - Solidão<br /><b>Capítulo 2</b> - Vivendo com... o outro</p>
+
+**Exemplo de entrada 3:**
+Parte I Fundamentos
+1 Hello, World!
+1.1 Programas
+Parte II Entrada e saída
+9 Fluxos de entrada e saída
+
+**Exemplo de saída 3:**
+<p><b>Parte I </b> - Fundamentos<br /><b>Capítulo 1</b> - Hello, World!</p><p><b>Parte II </b> - Fundamentos<br /><b>Capítulo 9</b> - Fluxos de entrada e saída</p>
+
+Observação: O texto de entrada pode conter números de página ou pontilhados (....). Ignore-os e foque apenas no título do capítulo e na numeração hierárquica. Se houver, inserir também apêndices e glossários, se houver capítulos antes da parte 1, também inserir. Não insira sub capítulos, como 1.1, 1.2, etc.
+Lembre-se! Se houver conteúdo extra como apêndices e glossários, insira-os.
+"""
+
+# Instruções do modo em lote (vão na mensagem do usuário, para não mudar o prefixo)
+INSTRUCAO_LOTE = """Abaixo há vários sumários, cada um iniciado por uma linha "### ISBN <número>".
+Processe cada sumário separadamente, seguindo as mesmas regras.
+Responda, na mesma ordem, com a linha "### ISBN <número>" e, na linha de baixo, o resultado daquele sumário em uma linha. Não escreva mais nada."""
+
+# Pontilhado seguido (ou não) do número de página
+RE_PONTILHADO_NUM = re.compile(r'\s*(?:(?:\.\s?){3,}|…+|(?:·\s?){3,})\s*(\d{1,4}|[ivxlcdm]{1,6})?\s*$', re.I)
+# Número de página separado por tabulação ou vários espaços
+RE_NUM_SEPARADO = re.compile(r'(\t|\s{2,})(\d{1,4})\s*$')
+RE_SO_NUMERO = re.compile(r'^(\d{1,4}|[ivxlcdm]{1,6})$', re.I)
+RE_MARCADOR_LOTE = re.compile(r'^#{2,}\s*ISBN:?\s*(\S+?)\s*#*\s*$', re.M)
+RE_INICIO_PARTE = re.compile(r'^(<[^>]+>\s*)*(parte|part|unidade|unit)\b', re.I)
+
+def estimar_tokens(texto):
+    """Estimativa barata de tokens (sem carregar o tokenizer do modelo)"""
+    return math.ceil(len(texto) / IA_CHARS_POR_TOKEN)
+
+def compactar_sumario(texto):
+    """
+    Remove o que não interessa à IA: pontilhados, números de página,
+    linhas vazias e espaços repetidos.
+
+    Linhas só com número são mantidas, exceto logo após um pontilhado
+    (no PDF o número do capítulo às vezes vem sozinho na linha).
+    """
+    linhas = []
+    anterior_pontilhado = False
+    for linha in texto.splitlines():
+        linha = linha.strip()
+        if not linha:
+            continue
+        if anterior_pontilhado and RE_SO_NUMERO.match(linha):
+            anterior_pontilhado = False
+            continue
+        anterior_pontilhado = bool(RE_PONTILHADO_NUM.search(linha))
+        linha = RE_PONTILHADO_NUM.sub('', linha)
+        linha = RE_NUM_SEPARADO.sub('', linha)
+        linha = re.sub(r'\s+', ' ', linha).strip()
+        if linha:
+            linhas.append(linha)
+    return "\n".join(linhas)
+
+def _orcamento_entrada():
+    """Tokens disponíveis para o texto do sumário em cada requisição"""
+    fixo = estimar_tokens(SYSTEM_PROMPT) + IA_MAX_TOKENS_RESPOSTA + IA_MARGEM_TOKENS
+    return max(256, IA_CONTEXTO_TOKENS - fixo)
+
+def dividir_em_blocos(texto, max_tokens):
+    """
+    Divide o sumário em blocos que caibam no orçamento de tokens.
+    Sempre que possível o corte é feito antes de uma "Parte", para não
+    separar a parte dos seus capítulos.
+    """
+    if estimar_tokens(texto) <= max_tokens:
+        return [texto]
+
+    blocos = []
+    atual = []
+    tokens_atual = 0
+    for linha in texto.splitlines():
+        t = estimar_tokens(linha) + 1
+        if atual and tokens_atual + t > max_tokens:
+            # Tenta cortar antes da última Parte da metade final do bloco
+            corte = next(
+                (k for k in range(len(atual) - 1, len(atual) // 2, -1)
+                 if RE_INICIO_PARTE.match(atual[k])),
+                len(atual)
+            )
+            blocos.append("\n".join(atual[:corte]))
+            atual = atual[corte:]
+            tokens_atual = sum(estimar_tokens(l) + 1 for l in atual)
+        atual.append(linha)
+        tokens_atual += t
+    if atual:
+        blocos.append("\n".join(atual))
+    return blocos
+
+def unir_respostas(respostas):
+    """
+    Une as respostas dos blocos em um único HTML.
+    Se um bloco não começa com uma Parte, seus capítulos continuam o
+    último parágrafo do bloco anterior.
+    """
+    final = ""
+    for r in respostas:
+        r = r.strip()
+        if not r:
+            continue
+        if final and final.endswith("</p>") and r.startswith("<p>") and not r.startswith("<p><b>Parte"):
+            final = final[:-len("</p>")] + "<br />" + r[len("<p>"):]
+        else:
+            final += r
+    return final
+
+def _extrair_html(texto):
+    """Limpa cercas de código e corta no último parágrafo completo"""
+    texto = texto.strip().strip('`').removeprefix('html').strip()
+    if "</p>" not in texto:
+        return None
+    return texto[:texto.rfind("</p>") + len("</p>")].replace("\n", "")
+
+def _ler_stream(response, max_chars, prefixo):
+    """
+    Lê a resposta SSE do LM Studio pedaço a pedaço, até o [DONE] (ou o fim
+    da conexão). Um </p> no meio não encerra: a resposta pode ter vários
+    parágrafos (um por Parte) e, no lote, vários sumários.
+
+    Para de ler antes (e fecha a conexão) se:
+    - a resposta claramente não começa com o prefixo esperado;
+    - a resposta passou do tamanho máximo esperado.
+
+    Returns:
+        str com o texto recebido ou None se a resposta for inválida ou
+        passar de max_chars
+    """
+    texto = ""
+    try:
+        for raw in response.iter_lines(decode_unicode=True):
+            if not raw or not raw.startswith("data:"):
+                continue
+            dado = raw[len("data:"):].strip()
+            if dado == "[DONE]":
+                break
+            delta = json.loads(dado)['choices'][0].get('delta', {}).get('content') or ""
+            texto += delta
+
+            inicio = texto.lstrip().lstrip('`').removeprefix('html').lstrip()
+            if len(inicio) >= len(prefixo) + 1 and not inicio.startswith(prefixo):
+                print("   [ERRO IA] Resposta fora do formato esperado, interrompida.")
+                return None
+            if len(texto) > max_chars:
+                # Resposta cortada não é sumário válido: melhor o erro que perder capítulos
+                print(f"   [ERRO IA] Resposta passou de {max_chars} caracteres sem terminar; descartada.")
+                return None
+    finally:
+        response.close()
+    return texto
+
+def _requisitar(mensagem, max_tokens, max_chars, prefixo):
+    """
+    Envia uma requisição com streaming. O SYSTEM_PROMPT é sempre a primeira
+    mensagem, idêntica em todas as chamadas, para o servidor reaproveitar
+    o prefixo já processado (cache de prompt).
+    """
+    # Import aqui: execuções sem IA não pagam o custo do requests
+    import requests
+    headers = {"Content-Type": "application/json"}
+    payload = {
+        "model": AI_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": mensagem}
+        ],
+        "temperature": 0.1,
+        "max_tokens": max_tokens,
+        "stream": True
+    }
+    if IA_CACHE_PROMPT:
+        payload["cache_prompt"] = True
+    response = requests.post(LOCAL_AI_URL, headers=headers, json=payload, stream=True, timeout=IA_TIMEOUT)
+    if response.status_code != 200:
+        print(f"   [ERRO IA] HTTP {response.status_code}")
+        response.close()
+        return None
+    return _ler_stream(response, max_chars, prefixo)
+
+def _limite_resposta(texto):
+    """Tamanho máximo esperado da resposta, pelo número de linhas (entradas) do texto"""
+    linhas = texto.count("\n") + 1
+    return len(texto) + linhas * IA_CHARS_POR_LINHA_RESPOSTA + IA_FOLGA_CHARS_RESPOSTA
+
+def _requisitar_bloco(bloco):
+    """Envia um bloco do sumário com streaming e retorna o HTML (ou None)"""
+    texto = _requisitar(
+        f"Texto do sumário:\n{bloco}",
+        max_tokens=IA_MAX_TOKENS_RESPOSTA,
+        max_chars=_limite_resposta(bloco),
+        prefixo="<p"
+    )
+    return _extrair_html(texto) if texto else None
+
+def chamar_ia_local(texto_sumario):
+    try:
+        texto = compactar_sumario(texto_sumario)
+        blocos = dividir_em_blocos(texto, _orcamento_entrada())
+        if len(blocos) > 1:
+            print(f"   -> Sumário grande ({estimar_tokens(texto)} tokens): dividido em {len(blocos)} blocos.")
+
+        respostas = []
+        for bloco in blocos:
+            resposta = _requisitar_bloco(bloco)
+            if resposta is None:
+                return ERRO_SUMARIO
+            respostas.append(resposta)
+        return unir_respostas(respostas)
+    except Exception as e:
+        print(f"   [ERRO IA] {e}")
+    return ERRO_SUMARIO
+
+# --- MODO EM LOTE ---
+
+def _orcamento_lote():
+    """Tokens para a entrada de um lote (a outra metade fica para a resposta)"""
+    livre = IA_CONTEXTO_TOKENS - estimar_tokens(SYSTEM_PROMPT) - estimar_tokens(INSTRUCAO_LOTE) - IA_MARGEM_TOKENS
+    return max(256, livre // 2)
+
+def _separar_respostas_lote(texto, isbns):
+    """Divide a resposta do lote pelos marcadores '### ISBN <n>' -> {isbn: html}"""
+    partes = RE_MARCADOR_LOTE.split(texto)
+    resultados = {}
+    for k in range(1, len(partes) - 1, 2):
+        isbn = partes[k]
+        html = _extrair_html(partes[k + 1])
+        if isbn in isbns and html and isbn not in resultados:
+            resultados[isbn] = html
+    return resultados
+
+def _requisitar_lote(isbns, textos):
+    """Envia vários sumários (já compactados) em uma requisição -> {isbn: html}"""
+    entrada = "\n\n".join(f"### ISBN {isbn}\n{textos[isbn]}" for isbn in isbns)
+    # Lido até o [DONE]: o último sumário do lote também pode ter vários parágrafos
+    texto = _requisitar(
+        f"{INSTRUCAO_LOTE}\n\n{entrada}",
+        max_tokens=_orcamento_lote(),
+        max_chars=_limite_resposta(entrada),
+        prefixo="###"
+    )
+    return _separar_respostas_lote(texto, isbns) if texto else {}
+
+def chamar_ia_local_lote(sumarios, ao_concluir=None):
+    """
+    Processa vários sumários com o mínimo de requisições.
+
+    Os sumários são agrupados em lotes (até IA_LOTE_MAX_LIVROS, dentro do
+    orçamento de tokens) e enviados delimitados por '### ISBN <n>'. Um
+    sumário ausente ou inválido na resposta é reenviado sozinho; sumários
+    grandes demais para um lote vão direto para chamar_ia_local.
+
+    Args:
+        sumarios: dict {isbn: texto do sumário}
+        ao_concluir: função (isbn, html) chamada assim que cada sumário
+                     fica pronto (ex.: gravar o arquivo sem esperar o resto)
+
+    Returns:
+        dict {isbn: html} com todos os ISBNs recebidos
+    """
+    resultados = {}
+    textos = {isbn: compactar_sumario(t) for isbn, t in sumarios.items()}
+    orcamento = _orcamento_lote()
+
+    lotes = []
+    atual = []
+    tokens_atual = 0
+    for isbn, texto in textos.items():
+        t = estimar_tokens(texto) + 8
+        if t > orcamento // 2:
+            lotes.append([isbn])
+            continue
+        if atual and (tokens_atual + t > orcamento or len(atual) >= IA_LOTE_MAX_LIVROS):
+            lotes.append(atual)
+            atual = []
+            tokens_atual = 0
+        atual.append(isbn)
+        tokens_atual += t
+    if atual:
+        lotes.append(atual)
+
+    for lote in lotes:
+        parciais = {}
+        if len(lote) > 1:
+            print(f"   -> IA em lote: {len(lote)} sumários em uma requisição...")
+            try:
+                parciais = _requisitar_lote(lote, textos)
+            except Exception as e:
+                print(f"   [ERRO IA] {e}")
+        for isbn in lote:
+            if isbn in parciais:
+                resultados[isbn] = parciais[isbn]
+            else:
+                if len(lote) > 1:
+                    print(f"   [AVISO IA] ISBN {isbn} ausente na resposta do lote, reenviando sozinho.")
+                resultados[isbn] = chamar_ia_local(sumarios[isbn])
+            if ao_concluir:
+                ao_concluir(isbn, resultados[isbn])
+    return resultados
@@ -0,0 +1,47 @@
+"""
+Leitura de PDF - Módulo
+-----------------------
+Abre os PDFs de entrada sobre um mmap somente-leitura, via
+fitz.open(stream=...).
+
+O PyMuPDF lê o memoryview sem copiar, então as páginas vêm direto do
+page cache do sistema: vários workers processando o mesmo livro
+compartilham a mesma memória em vez de cada um manter seus buffers.
+
+Uso:
+    from leitura_pdf import abrir_pdf
+
+    doc = abrir_pdf(caminho_pdf)
+"""
+import mmap
+import fitz
+
+# False = abre pelo caminho, como antes
+LEITURA_MMAP = True
+
+def abrir_pdf(pdf_path):
+    """
+    Abre um PDF sobre um mmap somente-leitura (ou pelo caminho, se o mmap
+    não for possível, ex.: arquivo vazio).
+
+    O mmap fica vivo enquanto o documento existir (doc.stream guarda a
+    referência). O caminho de origem fica em doc.caminho_origem, já que
+    doc.name é vazio para documentos abertos por stream.
+    """
+    if LEITURA_MMAP:
+        try:
+            with open(pdf_path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            mm = None
+        if mm is not None:
+            doc = fitz.open(stream=memoryview(mm), filetype="pdf")
+            doc.caminho_origem = pdf_path
+            return doc
+    doc = fitz.open(pdf_path)
+    doc.caminho_origem = pdf_path
+    return doc
+
+def origem_pdf(doc):
+    """Caminho de origem do documento (funciona também para os abertos por stream)"""
+    return getattr(doc, 'caminho_origem', None) or doc.name
@@ -0,0 +1,163 @@
+"""
+Lote de Capas - Módulo
+----------------------
+Modo só-capa para catálogos sem miolo: encontra os PDFs de capa direto
+na pasta de entrada e roda o processar_capa em um pool de processos.
+
+Não importa o cliente de IA nem as bibliotecas de epub: o custo por livro
+é só abrir a capa, detectar (ou reaproveitar o sidecar) e exportar os
+painéis.
+
+Os livros são despachados do mais caro para o mais barato (LPT), pela
+estimativa de custo do estimativa.py (tamanho e densidade de caminhos da
+capa), para que as capas pesadas não fiquem para o final do lote. No fim,
+o makespan previsto é comparado com o real.
+
+A concorrência se adapta à memória (memoria.py): o despacho pausa quando
+a memória livre fica baixa, e livros cujo worker morreu (OOM) são
+reexecutados um a um para isolar o culpado.
+
+Uso:
+    python lote_capas.py
+
+    from lote_capas import processar_lote_capas
+    resumo = processar_lote_capas("./entrada", "./saida")
+"""
+import os
+import io
+import sys
+import time
+import shutil
+import contextlib
+
+from estimativa import estimar_custos, ordenar_lpt, relatorio_makespan
+from memoria import executar_com_memoria
+
+# --- CONFIGURAÇÕES ---
+INPUT_DIR = "./entrada"
+OUTPUT_DIR = "./saida"
+
+# Número de processos (None = nº de CPUs)
+LOTE_MAX_WORKERS = None
+
+# Despacha os livros mais caros primeiro (False = ordem do ISBN)
+LOTE_LPT = True
+
+# Copia também o PDF original da capa para a pasta do livro
+LOTE_COPIAR_PDF = False
+
+# Pula livros com capa e 4ª capa exportadas depois da última alteração do PDF
+LOTE_PULAR_PRONTOS = True
+
+# Mostra as mensagens do processar_capa de cada livro (senão só o resumo)
+LOTE_VERBOSO = False
+
+def encontrar_capas(input_dir):
+    """
+    Encontra os PDFs de capa na pasta de entrada.
+
+    Returns:
+        list: [(isbn, caminho_pdf)] ordenado por ISBN (um PDF por ISBN)
+    """
+    capas = {}
+    for f in sorted(os.listdir(input_dir)):
+        f_lower = f.lower()
+        if not f_lower.endswith('.pdf') or 'capa' not in f_lower:
+            continue
+        if 'miolo' in f_lower or 'interior' in f_lower:
+            continue
+        isbn = f.split('_')[0]
+        capas.setdefault(isbn, os.path.join(input_dir, f))
+    return sorted(capas.items())
+
+def _ja_processado(pasta_livro, isbn, path_capa):
+    mtime_capa = os.path.getmtime(path_capa)
+    for nome in (f"{isbn}_capa.png", f"{isbn}_quartacapa.png"):
+        caminho = os.path.join(pasta_livro, nome)
+        if not os.path.exists(caminho) or os.path.getmtime(caminho) < mtime_capa:
+            return False
+    return True
+
+def _processar_um(args):
+    """Worker: processa a capa de um livro e devolve o resumo"""
+    isbn, path_capa, output_dir = args
+    # Import aqui: o processo principal só lista arquivos e distribui
+    from detector_capa import processar_capa
+
+    inicio = time.perf_counter()
+    pasta_livro = os.path.join(output_dir, isbn)
+    os.makedirs(pasta_livro, exist_ok=True)
+
+    saida = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(saida):
+            # Páginas em série: a concorrência é a do lote
+            resultado = processar_capa(path_capa, pasta_livro, isbn, max_workers=1)
+            if LOTE_COPIAR_PDF:
+                shutil.copy2(path_capa, os.path.join(pasta_livro, os.path.basename(path_capa)))
+        status = 'ok' if resultado.get('capa') and resultado.get('quarta_capa') else 'incompleto'
+    except Exception as e:
+        saida.write(f"   [ERRO] {e}\n")
+        status = 'erro'
+
+    return {
+        'isbn': isbn,
+        'status': status,
+        'tempo': time.perf_counter() - inicio,
+        'log': saida.getvalue(),
+    }
+
+def processar_lote_capas(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR, max_workers=LOTE_MAX_WORKERS):
+    """
+    Processa todas as capas da pasta de entrada em paralelo.
+
+    Returns:
+        dict: contagem por status ('ok', 'incompleto', 'erro', 'pulado')
+              e lista 'falhas' com os ISBNs de 'erro'/'incompleto'
+    """
+    capas = encontrar_capas(input_dir)
+    print(f"--- LOTE DE CAPAS ({len(capas)} livros) ---")
+    resumo = {'ok': 0, 'incompleto': 0, 'erro': 0, 'pulado': 0, 'falhas': []}
+    if not capas:
+        print("Nenhum arquivo de Capa encontrado.")
+        return resumo
+
+    os.makedirs(output_dir, exist_ok=True)
+    caminhos = dict(capas)
+    if LOTE_PULAR_PRONTOS:
+        # Filtra antes da estimativa: livros prontos nem são abertos
+        for isbn, path_capa in capas:
+            if _ja_processado(os.path.join(output_dir, isbn), isbn, path_capa):
+                del caminhos[isbn]
+                resumo['pulado'] += 1
+    custos = estimar_custos(caminhos, {isbn: {'capa': p} for isbn, p in caminhos.items()}, ['capa'])
+    ordem = ordenar_lpt(custos) if LOTE_LPT else sorted(caminhos)
+    workers = max_workers or os.cpu_count() or 1
+    tempos = {}
+    inicio = time.perf_counter()
+
+    # Um livro por envio, na ordem LPT, com a concorrência limitada pela memória
+    tarefas = [(isbn, (isbn, caminhos[isbn], output_dir)) for isbn in ordem]
+    for i, (isbn, r, erro) in enumerate(executar_com_memoria(_processar_um, tarefas, workers), 1):
+        if erro:
+            r = {'isbn': isbn, 'status': 'erro', 'tempo': 0.0, 'log': f"   [ERRO] {erro}\n"}
+        resumo[r['status']] += 1
+        if r['status'] in ('erro', 'incompleto'):
+            resumo['falhas'].append(r['isbn'])
+        if LOTE_VERBOSO or r['status'] == 'erro':
+            print(f"\nISBN: {r['isbn']}\n{r['log']}", end="")
+        tempos[r['isbn']] = r['tempo']
+        print(f"   [{i}/{len(ordem)}] {r['isbn']}: {r['status']} ({r['tempo']:.2f}s)")
+
+    decorrido = time.perf_counter() - inicio
+    print(f"\n   [OK] {resumo['ok']} ok, {resumo['incompleto']} incompletos, "
+          f"{resumo['erro']} com erro, {resumo['pulado']} pulados em {decorrido:.1f}s")
+    tempos = {i: t for i, t in tempos.items() if t}
+    if tempos:
+        relatorio_makespan({i: custos[i] for i in tempos}, tempos, workers, decorrido)
+    return resumo
+
+if __name__ == "__main__":
+    entrada = sys.argv[1] if len(sys.argv) > 1 else INPUT_DIR
+    saida = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_DIR
+    processar_lote_capas(entrada, saida)
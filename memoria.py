@@ -0,0 +1,172 @@
+"""
+Memória - Módulo
+----------------
+Pool de processos com concorrência adaptada à pressão de memória.
+
+- Acompanha o RSS de cada worker e a memória disponível do sistema
+  (MemAvailable do /proc/meminfo).
+- Só despacha um novo livro se, descontado o maior RSS de worker já
+  observado, ainda sobrar MEM_RESERVA_MB; senão pausa o despacho até
+  algum livro terminar (sempre há pelo menos um em andamento).
+- Se um worker morrer (ex.: OOM killer), o pool quebra sem dizer qual
+  livro estava nele: os livros em andamento são reexecutados um a um,
+  cada um sozinho num pool, e só o que derruba o worker sozinho é
+  contado como tentativa (até MEM_MAX_TENTATIVAS, depois vira erro).
+  O resto da fila volta a rodar com max_workers.
+
+Fora do Linux (sem /proc) não há limitação: o pool roda com todos os
+workers, como um ProcessPoolExecutor comum.
+
+Uso:
+    from memoria import executar_com_memoria
+
+    for chave, resultado, erro in executar_com_memoria(funcao, [(chave, args), ...], max_workers=4):
+        ...
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+# --- CONFIGURAÇÕES DE MEMÓRIA ---
+# Memória que deve continuar livre depois de despachar mais um livro
+MEM_RESERVA_MB = 1024
+
+# RSS presumido por worker antes de observar algum
+MEM_RSS_INICIAL_MB = 800
+
+# Intervalo de amostragem do RSS / espera quando o despacho está pausado
+MEM_AMOSTRAGEM_S = 0.5
+
+# Tentativas por livro quando o worker morre
+MEM_MAX_TENTATIVAS = 3
+
+def memoria_disponivel_mb():
+    """MemAvailable do sistema em MB, ou None se não houver /proc/meminfo"""
+    try:
+        with open("/proc/meminfo") as f:
+            for linha in f:
+                if linha.startswith("MemAvailable:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def rss_mb(pid):
+    """RSS atual de um processo em MB (VmRSS do /proc), ou None"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def _pids_workers(pool):
+    """
+    Pids dos workers do pool. _processes é interno do ProcessPoolExecutor;
+    se não existir, usa os processos filhos ativos (pode incluir outros filhos).
+    """
+    processos = getattr(pool, "_processes", None)
+    if isinstance(processos, dict):
+        return list(processos)
+    return [p.pid for p in multiprocessing.active_children()]
+
+def _rss_workers(pool):
+    valores = [rss_mb(pid) for pid in _pids_workers(pool)]
+    return [v for v in valores if v is not None]
+
+def _executar_pool(funcao, fila, limite, estado):
+    """
+    Consome a fila (lista de (chave, args)) num pool com até `limite` workers,
+    despachando só enquanto houver memória.
+
+    Yields:
+        tuple: (chave, resultado, erro) dos livros que terminaram
+
+    Returns:
+        list: (chave, args) que estavam em andamento se o pool quebrou; [] se não
+    """
+    pool = ProcessPoolExecutor(max_workers=limite)
+    em_andamento = {}
+    quebrou = False
+    try:
+        while fila or em_andamento:
+            # Despacha enquanto houver vaga e memória
+            while fila and len(em_andamento) < limite:
+                disponivel = memoria_disponivel_mb()
+                necessario = estado['rss_max'] or MEM_RSS_INICIAL_MB
+                if em_andamento and disponivel is not None and disponivel - necessario < MEM_RESERVA_MB:
+                    if not estado['pausado']:
+                        print(f"   [AVISO] Memória baixa ({disponivel:.0f}MB livres): despacho pausado "
+                              f"com {len(em_andamento)} livro(s) em andamento.")
+                    estado['pausado'] = True
+                    break
+                estado['pausado'] = False
+                chave, args = fila.pop(0)
+                em_andamento[pool.submit(funcao, args)] = (chave, args)
+
+            feitos, _ = wait(em_andamento, timeout=MEM_AMOSTRAGEM_S, return_when=FIRST_COMPLETED)
+            rss = _rss_workers(pool)
+            if rss:
+                estado['rss_max'] = max(estado['rss_max'] or 0, max(rss))
+
+            for futuro in feitos:
+                try:
+                    resultado, erro = futuro.result(), None
+                except BrokenProcessPool:
+                    # Worker morto: fica em em_andamento (tratado pelo chamador)
+                    quebrou = True
+                    continue
+                except Exception as e:
+                    resultado, erro = None, str(e)
+                chave, _ = em_andamento.pop(futuro)
+                yield chave, resultado, erro
+            if quebrou:
+                return list(em_andamento.values())
+        return []
+    finally:
+        pool.shutdown(wait=not quebrou, cancel_futures=True)
+
+def executar_com_memoria(funcao, tarefas, max_workers):
+    """
+    Executa funcao(args) para cada tarefa, na ordem dada, com a concorrência
+    limitada pela memória disponível.
+
+    Args:
+        funcao: Função de nível de módulo (precisa ser serializável)
+        tarefas: Lista de (chave, args)
+        max_workers: Concorrência máxima
+
+    Yields:
+        tuple: (chave, resultado, erro) conforme os livros terminam;
+               erro é None ou a mensagem da falha
+    """
+    pendentes = list(tarefas)
+    suspeitos = []
+    tentativas = {}
+    estado = {'rss_max': None, 'pausado': False}
+
+    while pendentes or suspeitos:
+        if suspeitos:
+            # Isolamento: um livro por vez, sozinho no pool
+            sozinho = suspeitos.pop(0)
+            em_andamento = yield from _executar_pool(funcao, [sozinho], 1, estado)
+        else:
+            em_andamento = yield from _executar_pool(funcao, pendentes, max(1, max_workers), estado)
+
+        if len(em_andamento) == 1:
+            # Só um livro no pool: é ele que derrubou o worker
+            chave, args = em_andamento[0]
+            tentativas[chave] = tentativas.get(chave, 0) + 1
+            if tentativas[chave] >= MEM_MAX_TENTATIVAS:
+                yield chave, None, "worker encerrado (provável falta de memória)"
+            else:
+                print(f"   [AVISO] Worker encerrado (provável OOM) em {chave}: "
+                      f"tentativa {tentativas[chave] + 1} de {MEM_MAX_TENTATIVAS}, sozinho.")
+                suspeitos.insert(0, (chave, args))
+        elif em_andamento:
+            # Não dá para saber qual livro estava no worker morto: isola todos
+            print(f"   [AVISO] Worker encerrado (provável OOM): {len(em_andamento)} livro(s) "
+                  f"reexecutado(s) um a um para isolar o culpado.")
+            suspeitos = em_andamento + suspeitos
@@ -0,0 +1,66 @@
+"""
+Perfis de Renderização - Módulo
+-------------------------------
+Perfis nomeados que definem, num lugar só, o nível de anti-aliasing, o
+espaço de cor, o alfa e o DPI das renderizações:
+
+- draft: análise (detecção, miniaturas, scanners). Sem anti-aliasing e em
+  tons de cinza: bem mais barato e suficiente para limiares e contornos.
+- preview: imagens de debug. RGB (as marcações são coloridas), DPI e
+  anti-aliasing reduzidos.
+- final: entregáveis (capa, 4ª capa, vitrine). Qualidade total.
+
+O anti-aliasing do MuPDF é global no processo, então aplicar_perfil o
+ajusta só durante a renderização e restaura o anterior em seguida.
+
+Uso:
+    from perfis_render import renderizar_perfil, aplicar_perfil
+
+    pix = renderizar_perfil(page, 'draft', clip=rect, dpi=300)
+    with aplicar_perfil('final'):
+        page.get_pixmap(dpi=300)
+"""
+import contextlib
+import fitz
+
+# --- PERFIS ---
+PERFIS = {
+    'draft': {'dpi': 72, 'aa': 0, 'colorspace': fitz.csGRAY, 'alpha': False},
+    'preview': {'dpi': 100, 'aa': 2, 'colorspace': fitz.csRGB, 'alpha': False},
+    'final': {'dpi': 300, 'aa': 8, 'colorspace': fitz.csRGB, 'alpha': False},
+}
+
+def perfil(nome):
+    """Configuração de um perfil (KeyError se não existir)"""
+    return PERFIS[nome]
+
+@contextlib.contextmanager
+def aplicar_perfil(nome):
+    """Ajusta o anti-aliasing do perfil enquanto o bloco executa"""
+    anterior = fitz.TOOLS.show_aa_level()
+    fitz.TOOLS.set_aa_level(PERFIS[nome]['aa'])
+    try:
+        yield PERFIS[nome]
+    finally:
+        _restaurar_aa(anterior)
+
+def _restaurar_aa(anterior):
+    """Volta os níveis de texto e de gráficos, que podem ser diferentes"""
+    mupdf = getattr(fitz, "mupdf", None)
+    if mupdf is not None and hasattr(mupdf, "fz_set_text_aa_level"):
+        mupdf.fz_set_graphics_aa_level(anterior['graphics'])
+        mupdf.fz_set_text_aa_level(anterior['text'])
+    else:
+        # PyMuPDF antigo: só há o ajuste conjunto
+        fitz.TOOLS.set_aa_level(anterior['graphics'])
+
+def renderizar_perfil(page, nome, clip=None, dpi=None):
+    """
+    page.get_pixmap com as configurações do perfil.
+
+    Args:
+        dpi: Sobrescreve o DPI do perfil (ex.: scanners que dependem da escala)
+    """
+    with aplicar_perfil(nome) as p:
+        return page.get_pixmap(dpi=dpi or p['dpi'], clip=clip,
+                               colorspace=p['colorspace'], alpha=p['alpha'])
@@ -1,257 +1,385 @@
 import os
 import shutil
+import argparse
 import fitz
-import requests
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
-import random
 
-# Importa o módulo de detecção de capa
-from detector_capa import processar_capa
+# Abre os PDFs de entrada sobre mmap
+from leitura_pdf import abrir_pdf
+# Índice miolo/capa/epub por ISBN, numa passada só pela pasta
+from arquivos_entrada import indexar_arquivos, localizar_arquivos
+
+# Os módulos das etapas (detector_capa, vitrine -> numpy, sumario -> bs4/
+# ebooklib, ia_local -> requests) são importados dentro de cada etapa, então
+# uma execução só-capa ou só-ensaio não paga pelas dependências das outras.
 
 # --- CONFIGURAÇÕES GERAIS ---
 INPUT_DIR = "./entrada"
 OUTPUT_DIR = "./saida"
 
-# --- CONFIGURAÇÕES DO LM STUDIO ---
-LOCAL_AI_URL = "http://localhost:1234/v1/chat/completions"
-AI_MODEL = "local-model"
+# Envia os sumários não estruturados à IA em lote, no final do processamento
+# (vários livros por requisição). False = uma requisição por livro, na hora.
+SUMARIO_IA_EM_LOTE = True
+
+# Ensaio de leitura otimizado para a loja (imagens reduzidas, RGB, fontes
+# em subset; ver ensaio_web.py). False = mantém as imagens do miolo.
+ENSAIO_WEB = True
+
+# Etapas do pipeline (selecionáveis com --etapas)
+ETAPAS = ['ensaio', 'vitrine', 'sumario', 'capa']
 
 # --- CONFIGURAÇÕES DE CORTE (MIOLO) ---
 # Conversão: 1mm = 2.83465 pontos do PDF
 MM_TO_PT = 2.83465
 
-# Defina aqui quanto cortar de margem para eliminar as marcas de corte
+# O corte usa, nesta ordem: TrimBox da página, BleedBox da página, marcas de
+# corte detectadas (uma vez por documento) e, por último, a margem fixa abaixo.
+# Defina aqui quanto cortar de margem quando nada disso estiver disponível
 MARGEM_CORTE_MM = 10.3 
 
-# Prompt para a IA (Sumário)
-SYSTEM_PROMPT = """
-Sua tarefa é receber um texto de sumário, enviado pelo usuário. O sumário poderá ou não ter tags html e você deve extrair apenas seções que sejam **partes** ou **capítulo de hierarquia principal** e passar para uma outra estrutura de tags. O Resultado final deverá ser em uma linha. Responda apenas o resultado.
+# Marcas de corte: traços retos curtos na faixa externa da página
+MARCAS_FAIXA_MM = 20
+MARCAS_COMPRIMENTO_MIN_PT = 4
+MARCAS_COMPRIMENTO_MAX_PT = 40
 
-**Exemplo de entrada 1:**
-<p class="SUM_Cap"><span class="_Cap"><a class="TitNum_Cor" href="cap_001.xhtml">Capítulo I</a></span></p>
-<p class="SUM_Cap2"><strong class="Bold_Compressed"><a class="Tit" href="cap_001.xhtml">TENDÊNCIAS PARA A FORMAÇÃO MÉDICA NO SÉCULO XXI</a></strong></p>
-<p class="SUM_Autor">DANNIELLE FERNANDES GODOI, ALEXANDRE SIZILIO</p>
-<p class="SUM_Cap"><span class="_Cap"><a class="TitNum_Cor" href="cap_002.xhtml">Capítulo II</a></span></p>
-<p class="SUM_Cap2"><strong class="Bold_Compressed"><a class="Tit" href="cap_002.xhtml">O PAPEL DA MEDICINA DE FAMÍLIA E COMUNIDADE NA FORMAÇÃO DO MÉDICO</a></strong></p>
+def garantir_pasta(pasta):
+    if not os.path.exists(pasta):
+        os.makedirs(pasta)
 
-**Exemplo de saída 1:**
-<p><b>Capítulo I</b> - TENDÊNCIAS PARA A FORMAÇÃO MÉDICA NO SÉCULO XXI<br /><b>Capítulo II</b> - O PAPEL DA MEDICINA DE FAMÍLIA E COMUNIDADE NA FORMAÇÃO DO MÉDICO</p>
+def contar_paginas(pdf_path):
+    """Número de páginas (só lê a estrutura do PDF, nada é renderizado)"""
+    doc = abrir_pdf(pdf_path)
+    total = len(doc)
+    doc.close()
+    return total
 
-**Exemplo de entrada 2:**
-Introdução
-1 ◼ Solidão
-2 ◼ Vivendo com... o outro
+# --- ÁREA DE CORTE (MIOLO) ---
 
-**Exemplo de saída 2:**
-<p><b>Capítulo 1</b> - Solidão<br /><b>Capítulo 2</b> - Vivendo com... o outro</p>
+def _tem_box(page, nome):
+    """True se a página define a box explicitamente (TrimBox/BleedBox não são herdadas)"""
+    tipo, _ = page.parent.xref_get_key(page.xref, nome)
+    return tipo == 'array'
 
-**Exemplo de entrada 3:**
-Parte I Fundamentos
-1 Hello, World!
-1.1 Programas
-Parte II Entrada e saída
-9 Fluxos de entrada e saída
+def _detectar_marcas_miolo(page):
+    """
+    Procura as marcas de corte nos cantos da página (traços curtos, retos,
+    na faixa externa) e devolve o retângulo entre elas, ou None.
 
-**Exemplo de saída 3:**
-<p><b>Parte I </b> - Fundamentos<br /><b>Capítulo 1</b> - Hello, World!</p><p><b>Parte II </b> - Fundamentos<br /><b>Capítulo 9</b> - Fluxos de entrada e saída</p>
+    O retângulo fica em coordenadas de page.rect (as de get_drawings).
 
-Observação: O texto de entrada pode conter números de página ou pontilhados (....). Ignore-os e foque apenas no título do capítulo e na numeração hierárquica. Se houver, inserir também apêndices e glossários, se houver capítulos antes da parte 1, também inserir. Não insira sub capítulos, como 1.1, 1.2, etc.
-Lembre-se! Se houver conteúdo extra como apêndices e glossários, insira-os.
-"""
+    Cruzes de registro no meio das bordas são ignoradas: um traço vertical
+    só conta se estiver na faixa de cima/baixo, e um horizontal só na
+    faixa da esquerda/direita.
+    """
+    r = page.rect
+    faixa = MARCAS_FAIXA_MM * MM_TO_PT
+    xs, ys = [], []
+    for path in page.get_drawings():
+        for item in path['items']:
+            if item[0] != 'l':
+                continue
+            a, b = item[1], item[2]
+            dx, dy = abs(a.x - b.x), abs(a.y - b.y)
+            if dx < 0.5 and MARCAS_COMPRIMENTO_MIN_PT <= dy <= MARCAS_COMPRIMENTO_MAX_PT:
+                y0, y1 = min(a.y, b.y), max(a.y, b.y)
+                if y1 <= r.y0 + faixa or y0 >= r.y1 - faixa:
+                    xs.append(a.x)
+            elif dy < 0.5 and MARCAS_COMPRIMENTO_MIN_PT <= dx <= MARCAS_COMPRIMENTO_MAX_PT:
+                x0, x1 = min(a.x, b.x), max(a.x, b.x)
+                if x1 <= r.x0 + faixa or x0 >= r.x1 - faixa:
+                    ys.append(a.y)
 
-def garantir_pasta(pasta):
-    if not os.path.exists(pasta):
-        os.makedirs(pasta)
+    # Marcas de sangria ficam por fora das de corte: de cada lado vale a
+    # marca mais próxima do centro da página
+    cx, cy = (r.x0 + r.x1) / 2, (r.y0 + r.y1) / 2
+    esq = [x for x in xs if x < cx]
+    dir_ = [x for x in xs if x > cx]
+    topo = [y for y in ys if y < cy]
+    base = [y for y in ys if y > cy]
+    if not (esq and dir_ and topo and base):
+        return None
+    rect = fitz.Rect(max(esq), max(topo), min(dir_), min(base))
+    # Sanidade: a área útil precisa ser a maior parte da página
+    if rect.width < r.width * 0.6 or rect.height < r.height * 0.6:
+        return None
+    return rect
 
-# --- FUNÇÕES DE PROCESSAMENTO ---
+def _box_na_pagina(page, box):
+    """
+    Box no formato do PyMuPDF (page.trimbox, page.bleedbox...) -> coordenadas
+    de page.rect, as que get_pixmap(clip=...) e get_text(clip=...) usam.
+    Diferem quando a CropBox não começa em (0, 0) ou a página tem /Rotate.
+    """
+    cb = page.cropbox
+    return (fitz.Rect(box) - (cb.x0, cb.y0, cb.x0, cb.y0)) * page.rotation_matrix
+
+def _pagina_para_box(page, rect):
+    """Inverso de _box_na_pagina (para set_cropbox)"""
+    cb = page.cropbox
+    return fitz.Rect(rect) * page.derotation_matrix + (cb.x0, cb.y0, cb.x0, cb.y0)
 
-def processar_miolo(pdf_path, epub_path, isbn, output_folder):
+def detectar_area_corte(doc):
     """
-    Gera:
-    1. _ensaiodeleitura.pdf (15 págs, com corte de margem)
-    2. _vi_0X.png (1ª Pág + 3 Aleatórias)
-    3. _sumario.txt (via IA)
+    Área de corte padrão do documento, calculada uma única vez (1ª página),
+    em coordenadas de page.rect.
+
+    Returns:
+        tuple: (fitz.Rect, descrição da estratégia usada)
     """
-    print(f"   -> Iniciando processamento do miolo...")
-    doc = fitz.open(pdf_path)
-    pdf_ensaio = fitz.open()
-    
-    # Define a margem em pontos
+    page = doc[0]
+    if _tem_box(page, "TrimBox"):
+        return _box_na_pagina(page, page.trimbox), "TrimBox"
+    if _tem_box(page, "BleedBox"):
+        return _box_na_pagina(page, page.bleedbox), "BleedBox"
+    rect = _detectar_marcas_miolo(page)
+    if rect:
+        return rect, "marcas de corte"
     margem_pt = MARGEM_CORTE_MM * MM_TO_PT
+    r = page.rect
+    rect = fitz.Rect(r.x0 + margem_pt, r.y0 + margem_pt, r.x1 - margem_pt, r.y1 - margem_pt)
+    return rect, f"margem fixa de {MARGEM_CORTE_MM}mm"
+
+def area_corte_pagina(page, area_padrao):
+    """
+    TrimBox/BleedBox da própria página, se houver; senão a área padrão do
+    documento. Em coordenadas de page.rect (clip de renderização).
+    """
+    if _tem_box(page, "TrimBox"):
+        rect = _box_na_pagina(page, page.trimbox)
+    elif _tem_box(page, "BleedBox"):
+        rect = _box_na_pagina(page, page.bleedbox)
+    else:
+        rect = area_padrao
+    return rect & page.rect
+
+# --- FUNÇÕES DE PROCESSAMENTO ---
+
+def gerar_ensaio(doc, area_padrao, estrategia_corte, isbn, output_folder):
+    """_ensaiodeleitura.pdf: as 15 primeiras páginas, cortadas na área útil"""
+    pdf_ensaio = fitz.open()
     
     # Define intervalo de páginas (0 até 15)
     start_page = 0
     end_page = min(15, len(doc))
     
-    # 1. GERA O PDF DE ENSAIO (CORTADO)
     for i in range(start_page, end_page):
         pdf_ensaio.insert_pdf(doc, from_page=i, to_page=i)
         page = pdf_ensaio[-1] # Pega a página recém inserida
         
-        # Aplica o corte (CropBox) reduzindo as margens
-        r = page.rect
-        novo_rect = fitz.Rect(
-            r.x0 + margem_pt, # Esquerda
-            r.y0 + margem_pt, # Topo
-            r.x1 - margem_pt, # Direita
-            r.y1 - margem_pt  # Base
-        )
-        page.set_cropbox(novo_rect)
+        # Aplica o corte (CropBox) na área útil da página
+        page.set_cropbox(_pagina_para_box(page, area_corte_pagina(doc[i], area_padrao)))
     
     path_ensaio = os.path.join(output_folder, f"{isbn}_ensaiodeleitura.pdf")
-    pdf_ensaio.save(path_ensaio)
-    print(f"   [OK] PDF Ensaio salvo (Corte aplicado de {MARGEM_CORTE_MM}mm).")
-    
-    # 2. GERA AS IMAGENS DE VITRINE (_vi_)
-    # Lógica: Página 1 fixa + 3 Aleatórias
-    doc_vi = fitz.open(path_ensaio)
-    total_paginas = len(doc_vi)
+    if ENSAIO_WEB:
+        from ensaio_web import salvar_ensaio_web
+        salvar_ensaio_web(pdf_ensaio, path_ensaio)
+        perfil = f", web {os.path.getsize(path_ensaio) / 1e6:.1f}MB"
+    else:
+        pdf_ensaio.save(path_ensaio)
+        perfil = ""
+    print(f"   [OK] PDF Ensaio salvo (Corte: {estrategia_corte}{perfil}).")
+
+def gerar_vitrine(doc, pdf_path, area_padrao, isbn, output_folder):
+    """_vi_XX.png: páginas fixas + as mais representativas de cada trecho do intervalo"""
+    from vitrine import selecionar_paginas, renderizar_paginas, VITRINE_SEMENTE
     
-    indices_para_exportar = []
+    rect_corte = area_corte_pagina(doc[0], area_padrao)
+    semente = VITRINE_SEMENTE if VITRINE_SEMENTE is not None else isbn
+    indices_para_exportar = selecionar_paginas(doc, semente=semente, clip=rect_corte)
     
-    if total_paginas > 0:
-        indices_para_exportar.append(0) # Sempre a primeira
+    # Renderiza só as escolhidas, em paralelo (cada worker com seu próprio handle do PDF)
+    tarefas = [
+        (page_idx, os.path.join(output_folder, f"{isbn}_vi_{i+1:02d}.png"))
+        for i, page_idx in enumerate(indices_para_exportar)
+    ]
+    renderizar_paginas(pdf_path, tarefas, clip=rect_corte)
         
-        paginas_restantes = list(range(1, total_paginas))
-        if paginas_restantes:
-            qtd_sorteio = min(3, len(paginas_restantes))
-            sorteadas = random.sample(paginas_restantes, qtd_sorteio)
-            indices_para_exportar.extend(sorted(sorteadas))
+    print(f"   [OK] Imagens de vitrine geradas ({len(indices_para_exportar)} págs: {[i+1 for i in indices_para_exportar]}).")
+
+def gerar_sumario(pdf_path, epub_path, isbn, output_folder, sumarios_ia=None):
+    """_sumario.txt: por regras, ou via IA se o sumário não for estruturado"""
+    from sumario import (
+        ler_toc_epub, extrair_toc_pdf, extrair_entradas_toc_pdf, formatar_sumario
+    )
     
-    for i, page_idx in enumerate(indices_para_exportar):
-        pix = doc_vi[page_idx].get_pixmap(dpi=150)
-        pix.save(os.path.join(output_folder, f"{isbn}_vi_0{i+1}.png"))
-        
-    print(f"   [OK] Imagens de vitrine geradas (1ª Fixa + {len(indices_para_exportar)-1} Aleatórias).")
+    tem_epub = epub_path and os.path.exists(epub_path)
+    path_sumario = os.path.join(output_folder, f"{isbn}_sumario.txt")
     
-    # 3. GERA O SUMÁRIO (IA)
-    raw_toc = None
-    if epub_path and os.path.exists(epub_path):
-        raw_toc = extrair_toc_epub(epub_path)
-        
+    # Sumário estruturado (nav/NCX do epub ou outline do PDF); o epub é
+    # lido uma vez só, para as entradas e para o texto
+    entradas, raw_toc = None, None
+    if tem_epub:
+        entradas, raw_toc = ler_toc_epub(epub_path)
+    if not entradas:
+        entradas = extrair_entradas_toc_pdf(pdf_path)
     
+    html_final = formatar_sumario(entradas)
+    if html_final:
+        with open(path_sumario, "w", encoding="utf-8") as f:
+            f.write(html_final)
+        print(f"   [OK] Sumário formatado localmente ({len(entradas)} entradas, sem IA).")
+        return
+    
+    # Texto não estruturado: limpeza via IA
     if not raw_toc:
         raw_toc = extrair_toc_pdf(pdf_path)
         
-    if raw_toc:
+    if raw_toc and sumarios_ia is not None:
+        sumarios_ia[isbn] = (raw_toc, path_sumario)
+        print(f"   -> Sumário encontrado ({len(raw_toc)} caracteres). Na fila da IA em lote.")
+    elif raw_toc:
+        from ia_local import chamar_ia_local, ERRO_SUMARIO
         print(f"   -> Sumário encontrado ({len(raw_toc)} caracteres). Enviando para a IA processar...")
         html_final = chamar_ia_local(raw_toc)
-        with open(os.path.join(output_folder, f"{isbn}_sumario.txt"), "w", encoding="utf-8") as f:
+        with open(path_sumario, "w", encoding="utf-8") as f:
             f.write(html_final)
-        print(f"   [OK] Sumário processado via IA.")
+        if html_final == ERRO_SUMARIO:
+            print(f"   [ERRO] IA não conseguiu processar o sumário.")
+        else:
+            print(f"   [OK] Sumário processado via IA.")
     else:
         print(f"   [FALHA] Sumário não encontrado automaticamente.")
 
-# --- FUNÇÕES AUXILIARES ---
-
-def chamar_ia_local(texto_sumario):
-    try:
-        headers = {"Content-Type": "application/json"}
-        payload = {
-            "model": AI_MODEL,
-            "messages": [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": f"Texto do sumário:\n{texto_sumario}"}
-            ],
-            "temperature": 0.1,
-            "stream": False
-        }
-        response = requests.post(LOCAL_AI_URL, headers=headers, json=payload)
-        if response.status_code == 200:
-            data = response.json()
-            if 'choices' in data:
-                return data['choices'][0]['message']['content'].strip()
-    except Exception as e:
-        print(f"   [ERRO IA] {e}")
-    return "<p>Erro ao processar sumário.</p>"
-
-def extrair_toc_epub(epub_path):
-    try:
-        book = epub.read_epub(epub_path)
-        for item in book.get_items_of_type(ebooklib.ITEM_DOCUMENT):
-            name = item.get_name().lower()
-            if any(x in name for x in ['toc', 'sumario', 'nav', 'contents']):
-                soup = BeautifulSoup(item.get_content(), 'html.parser')
-                return soup.get_text(separator='\n')
-        if book.toc:
-            t = ""
-            for x in book.toc: t += f"{x.title if hasattr(x, 'title') else x[0].title}\n"
-            return t
-    except: pass
-    return None
-
-def extrair_toc_pdf(pdf_path):
-    doc = fitz.open(pdf_path)
-    toc = doc.get_toc()
-    if toc: return "\n".join([x[1] for x in toc])
-    txt = ""
-    for i in range(min(25, len(doc))):
-        page_txt = doc[i].get_text()
-        if any(x in page_txt.lower() for x in ['sumário', 'contents']):
-            txt += page_txt
-            if i+1 < len(doc): txt += doc[i+1].get_text()
-            return txt
-    return None
+def processar_miolo(pdf_path, epub_path, isbn, output_folder, sumarios_ia=None, etapas=ETAPAS):
+    """
+    Se sumarios_ia (dict) for informado, o texto do sumário que precisa de IA
+    é guardado nele ({isbn: (texto, caminho_saida)}) para envio em lote no
+    final, em vez de chamar a IA na hora.
+
+    Gera (conforme as etapas):
+    1. _ensaiodeleitura.pdf (15 págs, cortadas na TrimBox/marcas de corte)
+    2. _vi_XX.png (páginas fixas + mais representativas do intervalo)
+    3. _sumario.txt (por regras, ou via IA se o sumário não for estruturado)
+    """
+    print(f"   -> Iniciando processamento do miolo...")
+    if 'ensaio' in etapas or 'vitrine' in etapas:
+        doc = abrir_pdf(pdf_path)
+        # Área de corte detectada uma vez e reaproveitada em todas as páginas
+        area_padrao, estrategia_corte = detectar_area_corte(doc)
+        
+        # 1. GERA O PDF DE ENSAIO (CORTADO)
+        if 'ensaio' in etapas:
+            gerar_ensaio(doc, area_padrao, estrategia_corte, isbn, output_folder)
+        
+        # 2. GERA AS IMAGENS DE VITRINE (_vi_)
+        if 'vitrine' in etapas:
+            gerar_vitrine(doc, pdf_path, area_padrao, isbn, output_folder)
+        doc.close()
+    
+    # 3. GERA O SUMÁRIO (regras locais; IA só para texto não estruturado)
+    if 'sumario' in etapas:
+        gerar_sumario(pdf_path, epub_path, isbn, output_folder, sumarios_ia)
+
+def gerar_sumarios_em_lote(sumarios_ia):
+    """Envia os sumários pendentes à IA em lote e grava cada _sumario.txt assim que fica pronto"""
+    from ia_local import chamar_ia_local_lote, ERRO_SUMARIO
+    print(f"\n--- SUMÁRIOS VIA IA EM LOTE ({len(sumarios_ia)} livros) ---")
+    
+    def gravar(isbn, html_final):
+        # Grava na hora: uma interrupção no meio do lote não perde o que já voltou
+        with open(sumarios_ia[isbn][1], "w", encoding="utf-8") as f:
+            f.write(html_final)
+        if html_final == ERRO_SUMARIO:
+            print(f"   [ERRO] {isbn}: IA não conseguiu processar o sumário.")
+        else:
+            print(f"   [OK] {isbn}: sumário processado via IA.")
+    
+    chamar_ia_local_lote({isbn: texto for isbn, (texto, _) in sumarios_ia.items()}, ao_concluir=gravar)
 
 # --- MAIN ---
 
-def main():
-    print("--- INICIANDO PROCESSAMENTO (COM CÓPIA DE CAPA) ---")
-    garantir_pasta(OUTPUT_DIR)
+def ler_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline de packshot (miolo, vitrine, sumário e capa).")
+    parser.add_argument(
+        '--etapas', default=",".join(ETAPAS),
+        help=f"Etapas separadas por vírgula (padrão: {','.join(ETAPAS)})"
+    )
+    parser.add_argument('--isbn', action='append', help="Processa só este ISBN (pode repetir)")
+    args = parser.parse_args(argv)
     
-    arquivos = os.listdir(INPUT_DIR)
+    etapas = [e.strip() for e in args.etapas.split(',') if e.strip()]
+    invalidas = [e for e in etapas if e not in ETAPAS]
+    if invalidas or not etapas:
+        parser.error(f"etapa(s) inválida(s): {', '.join(invalidas) or '(nenhuma)'}; use {', '.join(ETAPAS)}")
+    return etapas, args.isbn
+
+def encontrar_isbns(arquivos, etapas):
+    """ISBNs a processar: os que têm miolo (ou também só-capa, se a única etapa for a capa)"""
+    etapas_miolo = [e for e in etapas if e != 'capa']
     isbns = set()
     for f in arquivos:
         if f.endswith('.pdf') and ('miolo' in f.lower() or 'interior' in f.lower()):
             isbns.add(f.split('_')[0])
     
+    so_capa = {
+        f.split('_')[0] for f in arquivos
+        if f.endswith('.pdf') and 'capa' in f.lower()
+    } - isbns
+    if 'capa' in etapas and not etapas_miolo:
+        # Só capa: o miolo não é necessário
+        isbns |= so_capa
+    elif so_capa:
+        print(f"   [AVISO] {len(so_capa)} capa(s) sem miolo ignorada(s); use lote_capas.py ou --etapas capa.")
+    return isbns
+
+def processar_livro(isbn, indice, etapas=ETAPAS, sumarios_ia=None, input_dir=INPUT_DIR, output_dir=OUTPUT_DIR):
+    """Roda as etapas selecionadas para um livro (indice: ver indexar_arquivos)"""
+    etapas_miolo = [e for e in etapas if e != 'capa']
+    print(f"\nISBN: {isbn}")
+    pasta_livro = os.path.join(output_dir, isbn)
+    garantir_pasta(pasta_livro)
+    
+    # Localiza arquivos
+    path_miolo, path_capa, path_epub = localizar_arquivos(isbn, indice, input_dir)
+    
+    # Processa Miolo e Sumário
+    if etapas_miolo and path_miolo:
+        processar_miolo(path_miolo, path_epub, isbn, pasta_livro, sumarios_ia, etapas_miolo)
+    elif etapas_miolo:
+        print("   [ERRO] Arquivo de miolo não encontrado.")
+
+    # Processa Capa (detecta e exporta capa e quarta capa)
+    if 'capa' in etapas and path_capa:
+        from detector_capa import processar_capa
+        print("   -> Processando capa...")
+        paginas_miolo = contar_paginas(path_miolo) if path_miolo else None
+        resultado_capa = processar_capa(path_capa, pasta_livro, isbn, paginas_miolo=paginas_miolo)
+        
+        if resultado_capa.get('capa'):
+            print(f"   [OK] Capa detectada e exportada.")
+        if resultado_capa.get('quarta_capa'):
+            print(f"   [OK] 4ª Capa detectada e exportada.")
+        
+        # Também copia o PDF original da capa
+        nome_arquivo_capa = os.path.basename(path_capa)
+        destino_capa = os.path.join(pasta_livro, nome_arquivo_capa)
+        shutil.copy2(path_capa, destino_capa)
+    elif 'capa' in etapas:
+        print("   [AVISO] Arquivo de Capa não encontrado.")
+
+def main(argv=None):
+    etapas, filtro_isbns = ler_argumentos(argv)
+    
+    print(f"--- INICIANDO PROCESSAMENTO (ETAPAS: {', '.join(etapas)}) ---")
+    garantir_pasta(OUTPUT_DIR)
+    
+    arquivos = os.listdir(INPUT_DIR)
+    isbns = encontrar_isbns(arquivos, etapas)
+    
+    if filtro_isbns:
+        isbns &= set(filtro_isbns)
+    
     if not isbns:
         print("Nenhum arquivo de Miolo encontrado.")
         return
 
-    for isbn in isbns:
-        print(f"\nISBN: {isbn}")
-        pasta_livro = os.path.join(OUTPUT_DIR, isbn)
-        garantir_pasta(pasta_livro)
-        
-        # Localiza arquivos
-        path_miolo = None
-        path_capa = None # Variável para guardar o caminho da capa
-        
-        for f in arquivos:
-            if f.startswith(isbn) and f.endswith(".pdf"):
-                f_lower = f.lower()
-                if "miolo" in f_lower or "interior" in f_lower:
-                    path_miolo = os.path.join(INPUT_DIR, f)
-                elif "capa" in f_lower:
-                    path_capa = os.path.join(INPUT_DIR, f)
-        
-        path_epub = os.path.join(INPUT_DIR, f"{isbn}.epub")
-        
-        # Processa Miolo e Sumário
-        if path_miolo:
-            processar_miolo(path_miolo, path_epub, isbn, pasta_livro)
-        else:
-            print("   [ERRO] Arquivo de miolo não encontrado.")
-
-        # Processa Capa (detecta e exporta capa e quarta capa)
-        if path_capa:
-            print("   -> Processando capa...")
-            resultado_capa = processar_capa(path_capa, pasta_livro, isbn)
-            
-            if resultado_capa.get('capa'):
-                print(f"   [OK] Capa detectada e exportada.")
-            if resultado_capa.get('quarta_capa'):
-                print(f"   [OK] 4ª Capa detectada e exportada.")
-            
-            # Também copia o PDF original da capa
-            nome_arquivo_capa = os.path.basename(path_capa)
-            destino_capa = os.path.join(pasta_livro, nome_arquivo_capa)
-            shutil.copy2(path_capa, destino_capa)
-        else:
-            print("   [AVISO] Arquivo de Capa não encontrado.")
+    sumarios_ia = {} if SUMARIO_IA_EM_LOTE and 'sumario' in etapas else None
+    indice = indexar_arquivos(arquivos, INPUT_DIR)
+
+    for isbn in sorted(isbns):
+        processar_livro(isbn, indice, etapas, sumarios_ia)
+
+    if sumarios_ia:
+        gerar_sumarios_em_lote(sumarios_ia)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,482 @@
+"""
+Sumário - Módulo
+----------------
+Localiza e extrai o texto do sumário (TOC) de um livro, a partir do
+epub (quando existir) ou do PDF do miolo.
+
+Quando o sumário já vem estruturado (nav/NCX do epub ou outline do PDF),
+formatar_sumario gera o HTML final por regras, sem precisar da IA.
+
+O epub é lido como zip (só OPF, nav e NCX); o ebooklib, que carrega o
+livro inteiro, fica apenas como fallback para epubs fora do padrão.
+O ebooklib e o BeautifulSoup só são importados quando usados.
+
+Uso:
+    from sumario import ler_toc_epub, extrair_toc_pdf, extrair_entradas_toc_pdf, formatar_sumario
+
+    # epub lido uma vez: entradas estruturadas e texto do mesmo zip
+    entradas, raw_toc = ler_toc_epub(caminho_epub)
+    entradas = entradas or extrair_entradas_toc_pdf(caminho_miolo)
+    raw_toc = raw_toc or extrair_toc_pdf(caminho_miolo)
+    html = formatar_sumario(entradas)  # None -> usar a IA
+"""
+import re
+import html
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from urllib.parse import unquote
+import fitz
+
+from leitura_pdf import abrir_pdf
+
+# --- CONFIGURAÇÕES DE LOCALIZAÇÃO (PDF) ---
+# Quantas páginas do início do miolo são inspecionadas
+TOC_MAX_PAGINAS = 25
+
+# Fração superior da página onde o título do sumário é procurado
+TOC_FRACAO_TOPO = 0.35
+
+# Máximo de páginas de continuação após a página do título
+TOC_MAX_CONTINUACAO = 8
+
+# Fração mínima de linhas "com cara de sumário" para uma página contar
+TOC_PONTUACAO_MINIMA = 0.3
+TOC_MIN_LINHAS_CONTINUACAO = 4
+
+# Sem título, só aceita uma página pela estrutura se for bem evidente
+TOC_PONTUACAO_SEM_TITULO = 0.5
+TOC_MIN_LINHAS_SEM_TITULO = 6
+
+# Títulos de sumário (PT / EN / ES), comparados com a linha inteira
+TOC_TITULOS = [
+    'sumário', 'sumario', 'índice', 'indice', 'conteúdo', 'conteudo',
+    'contents', 'table of contents',
+    'contenido', 'contenidos', 'índice general', 'indice general', 'tabla de contenido',
+]
+
+# Pontilhados (....), reticências e pontos médios usados como guia
+RE_PONTILHADO = re.compile(r'(\.\s?){4,}|…{2,}|(·\s?){3,}')
+# Número de página no fim da linha (ou linha só com o número)
+RE_NUM_PAGINA = re.compile(r'(^|\s)\d{1,4}$')
+
+# --- REGRAS DE FORMATAÇÃO (SUMÁRIO ESTRUTURADO) ---
+_SEP = r'\s*[-–—:.)◼■•|]*\s*'
+_NUMERAL = r'(\d+|(?-i:[IVXLCDM]+)|um|uma|dois|duas|três|tres|quatro|cinco|one|two|three|four|five|uno|dos|tres|cuatro|cinco)'
+
+RE_PARTE = re.compile(r'^(parte|part|unidade|unit|unidad)\s+' + _NUMERAL + r'\b' + _SEP + r'(.*)$', re.I)
+RE_CAPITULO = re.compile(r'^(cap[íi]tulo|chapter|cap\.)\s*' + _NUMERAL + r'\b' + _SEP + r'(.*)$', re.I)
+RE_SUBCAPITULO = re.compile(r'^\d+(\.\d+)+\b')
+RE_NUMERADO = re.compile(r'^(\d{1,3})(?!\d|\.\d)' + _SEP + r'(\S.*)$')
+RE_EXTRA = re.compile(
+    r'^((?:ap[êeé]ndices?|anexos?|appendix|appendices|gloss[áa]rio|glossary|glosario)'
+    r'(?:\s+(?:\d+|[A-Z]|(?-i:[IVXLCDM]+))\b)?)' + _SEP + r'(.*)$', re.I
+)
+
+def _limpar_titulo(titulo):
+    """Remove espaços extras e o pontilhado (com o número de página) do fim do título"""
+    titulo = re.sub(r'\s+', ' ', titulo or '').strip()
+    m = RE_PONTILHADO.search(titulo)
+    if m:
+        titulo = titulo[:m.start()]
+    return titulo.strip(' -–—:')
+
+def _rotulo(palavra, numeral):
+    """Rótulo no idioma do sumário: 'CHAPTER one' -> 'Chapter One', 'capítulo IV' -> 'Capítulo IV'"""
+    return f"{palavra[0].upper()}{palavra[1:].lower()} {numeral[0].upper()}{numeral[1:]}"
+
+def _classificar_entrada(titulo):
+    """
+    Classifica uma entrada do sumário.
+
+    Returns:
+        tuple: (tipo, rótulo, título) com tipo em 'parte', 'capitulo',
+               'numerado' (só o número; rótulo = número), 'extra',
+               'subcapitulo' ou 'outro'
+    """
+    m = RE_PARTE.match(titulo)
+    if m:
+        return 'parte', _rotulo(m.group(1), m.group(2)), m.group(3)
+    m = RE_CAPITULO.match(titulo)
+    if m:
+        return 'capitulo', _rotulo(m.group(1), m.group(2)), m.group(3)
+    if RE_SUBCAPITULO.match(titulo):
+        return 'subcapitulo', None, titulo
+    m = RE_NUMERADO.match(titulo)
+    if m:
+        return 'numerado', m.group(1), m.group(2)
+    m = RE_EXTRA.match(titulo)
+    if m:
+        return 'extra', m.group(1), m.group(2)
+    return 'outro', None, titulo
+
+def _palavra_capitulo(classificadas):
+    """Palavra para 'capítulo' no idioma do sumário, pelos rótulos que vieram escritos"""
+    for _, tipo, rotulo, _ in classificadas:
+        if tipo == 'capitulo':
+            return rotulo.split()[0]
+    for _, tipo, rotulo, _ in classificadas:
+        if tipo in ('parte', 'extra'):
+            ingles = rotulo.split()[0].lower() in ('part', 'unit', 'appendix', 'appendices', 'glossary')
+            return "Chapter" if ingles else "Capítulo"
+    return "Capítulo"
+
+def _resolver_numerados(classificadas):
+    """
+    Entradas só com número ("1 Introdução") viram capítulos apenas se a
+    numeração for sequencial (começa em 0 ou 1, segue de um em um e pode
+    recomeçar em 1 depois de uma Parte). Títulos que só começam com um
+    número ("10 coisas que odeio", "100 anos de solidão") viram 'outro'.
+    """
+    numerados = [c for c in classificadas if c[1] == 'numerado']
+    if not numerados:
+        return classificadas
+    nivel_num = min(c[0] for c in numerados)
+    sequencial = True
+    ultimo = None
+    depois_da_parte = False
+    for nivel, tipo, rotulo, _ in classificadas:
+        if tipo == 'parte':
+            depois_da_parte = True
+        elif tipo == 'numerado' and nivel == nivel_num:
+            n = int(rotulo)
+            esperados = {0, 1} if ultimo is None else {ultimo + 1}
+            if depois_da_parte:
+                esperados.add(1)
+            if n not in esperados:
+                sequencial = False
+                break
+            ultimo, depois_da_parte = n, False
+    palavra = _palavra_capitulo(classificadas)
+    resolvidas = []
+    for nivel, tipo, rotulo, titulo in classificadas:
+        if tipo == 'numerado':
+            if sequencial and nivel == nivel_num:
+                tipo, rotulo = 'capitulo', f"{palavra} {rotulo}"
+            else:
+                tipo, rotulo, titulo = 'outro', None, f"{rotulo} {titulo}"
+        resolvidas.append((nivel, tipo, rotulo, titulo))
+    return resolvidas
+
+def formatar_sumario(entradas):
+    """
+    Formata um sumário estruturado no HTML final, sem IA.
+
+    Mantém partes, capítulos de hierarquia principal (inclusive os anteriores
+    à Parte 1) e apêndices/anexos/glossários. Descarta subcapítulos (1.1, 1.2...)
+    e entradas sem numeração (Introdução, Prefácio...). Os rótulos ficam no
+    idioma do sumário (Chapter One, Capítulo 1, Part II).
+
+    Args:
+        entradas: lista de tuplas (nivel, titulo), nivel 1 = topo
+
+    Returns:
+        str com o HTML (<p><b>Capítulo N</b> - Título<br />...</p>) ou None
+        se a estrutura não for clara o bastante (nesse caso, usar a IA)
+    """
+    if not entradas:
+        return None
+
+    classificadas = []
+    for nivel, titulo in entradas:
+        titulo = _limpar_titulo(titulo)
+        if titulo:
+            classificadas.append((nivel,) + _classificar_entrada(titulo))
+    classificadas = _resolver_numerados(classificadas)
+
+    # Descarta os filhos de capítulos/apêndices (subcapítulos sem numeração)
+    mantidas = []
+    nivel_bloqueio = None
+    for nivel, tipo, rotulo, titulo in classificadas:
+        if nivel_bloqueio is not None and nivel > nivel_bloqueio:
+            continue
+        nivel_bloqueio = nivel if tipo in ('capitulo', 'extra') else None
+        mantidas.append((nivel, tipo, rotulo, titulo))
+
+    niveis_cap = [c[0] for c in mantidas if c[1] == 'capitulo']
+    if len(niveis_cap) < 2:
+        return None
+    outros = [c for c in mantidas if c[1] == 'outro' and c[0] <= min(niveis_cap)]
+    if len(niveis_cap) < len(outros):
+        # Maioria sem numeração: provavelmente capítulos sem número, melhor a IA
+        return None
+
+    blocos = []
+    atual = []
+    for nivel, tipo, rotulo, titulo in mantidas:
+        if tipo in ('outro', 'subcapitulo'):
+            continue
+        item = f"<b>{rotulo}</b>"
+        titulo = _limpar_titulo(titulo)
+        if titulo:
+            item += f" - {html.escape(titulo, quote=False)}"
+        if tipo == 'parte':
+            if atual:
+                blocos.append(atual)
+            atual = [item]
+        else:
+            atual.append(item)
+    if atual:
+        blocos.append(atual)
+
+    return "".join(f"<p>{'<br />'.join(b)}</p>" for b in blocos)
+
+def _linhas_pagina(page, clip=None):
+    """Linhas não vazias do texto da página (opcionalmente só dentro do clip)"""
+    texto = page.get_text("text", clip=clip)
+    return [l.strip() for l in texto.splitlines() if l.strip()]
+
+def _eh_titulo_sumario(linha):
+    """True se a linha for um título de sumário (e não só uma menção no texto)"""
+    l = linha.lower().strip(' :.\t')
+    return l in TOC_TITULOS
+
+def _pontuar_linhas(linhas):
+    """Fração de linhas com pontilhado ou número de página no final"""
+    if not linhas:
+        return 0.0
+    hits = sum(1 for l in linhas if RE_PONTILHADO.search(l) or RE_NUM_PAGINA.search(l))
+    return hits / len(linhas)
+
+def localizar_paginas_toc(doc, max_paginas=TOC_MAX_PAGINAS):
+    """
+    Localiza as páginas do sumário em um PDF sem outline.
+
+    1. Procura o título (Sumário/Contents/Índice...) apenas no topo de cada página.
+    2. Pontua as candidatas pela estrutura (pontilhados e números de página)
+       e fica com a melhor.
+    3. Anexa as páginas seguintes enquanto continuarem com cara de sumário.
+
+    Returns:
+        tuple: (lista de índices de página, dict {índice: linhas já extraídas})
+    """
+    n = min(max_paginas, len(doc))
+    linhas_cache = {}
+
+    def linhas(i):
+        if i not in linhas_cache:
+            linhas_cache[i] = _linhas_pagina(doc[i])
+        return linhas_cache[i]
+
+    # 1. Título no topo da página (extração limitada à região superior)
+    candidatas = []
+    for i in range(n):
+        r = doc[i].rect
+        topo = fitz.Rect(r.x0, r.y0, r.x1, r.y0 + r.height * TOC_FRACAO_TOPO)
+        if any(_eh_titulo_sumario(l) for l in _linhas_pagina(doc[i], clip=topo)):
+            candidatas.append(i)
+
+    # 2. Melhor candidata pela estrutura
+    if candidatas:
+        inicio = max(candidatas, key=lambda i: _pontuar_linhas(linhas(i)))
+    else:
+        # Sem título: aceita a primeira página claramente estruturada
+        inicio = next(
+            (i for i in range(n)
+             if len(linhas(i)) >= TOC_MIN_LINHAS_SEM_TITULO
+             and _pontuar_linhas(linhas(i)) >= TOC_PONTUACAO_SEM_TITULO),
+            None
+        )
+        if inicio is None:
+            return [], linhas_cache
+
+    # 3. Páginas contíguas de continuação
+    paginas = [inicio]
+    fim = min(inicio + 1 + TOC_MAX_CONTINUACAO, len(doc))
+    for i in range(inicio + 1, fim):
+        if len(linhas(i)) < TOC_MIN_LINHAS_CONTINUACAO:
+            break
+        if _pontuar_linhas(linhas(i)) < TOC_PONTUACAO_MINIMA:
+            break
+        paginas.append(i)
+
+    return paginas, linhas_cache
+
+# --- LEITURA LEVE DO EPUB (zip + OPF + nav/NCX) ---
+NS_EPUB = {
+    'c': 'urn:oasis:names:tc:opendocument:xmlns:container',
+    'opf': 'http://www.idpf.org/2007/opf',
+    'ncx': 'http://www.daisy.org/z3986/2005/ncx/',
+    'x': 'http://www.w3.org/1999/xhtml',
+}
+_EPUB_TYPE = '{http://www.idpf.org/2007/ops}type'
+
+def _ler_manifesto_epub(zf):
+    """
+    Lê apenas container.xml e o OPF.
+
+    Returns:
+        list de dicts (id, href relativo ao OPF, caminho no zip, tipo, props)
+        na ordem do manifesto
+    """
+    container = ET.fromstring(zf.read('META-INF/container.xml'))
+    opf_path = container.find('.//c:rootfile', NS_EPUB).get('full-path')
+    base = posixpath.dirname(opf_path)
+    opf = ET.fromstring(zf.read(opf_path))
+
+    spine = opf.find('opf:spine', NS_EPUB)
+    toc_id = spine.get('toc') if spine is not None else None
+
+    itens = []
+    for item in opf.findall('opf:manifest/opf:item', NS_EPUB):
+        href = unquote(item.get('href', ''))
+        props = (item.get('properties') or '').split()
+        tipo = item.get('media-type', '')
+        if item.get('id') == toc_id and toc_id:
+            props.append('ncx')
+        itens.append({
+            'id': item.get('id'),
+            'href': href,
+            'caminho': posixpath.normpath(posixpath.join(base, href)),
+            'tipo': tipo,
+            'props': props,
+        })
+    return itens
+
+def _texto_elemento(el):
+    return ' '.join(''.join(el.itertext()).split())
+
+def _entradas_ncx(dados):
+    """navMap do NCX -> lista de (nivel, titulo)"""
+    saida = []
+
+    def percorrer(pai, nivel):
+        for ponto in pai.findall('ncx:navPoint', NS_EPUB):
+            texto = ponto.find('ncx:navLabel/ncx:text', NS_EPUB)
+            saida.append((nivel, _texto_elemento(texto) if texto is not None else ''))
+            percorrer(ponto, nivel + 1)
+
+    nav_map = ET.fromstring(dados).find('ncx:navMap', NS_EPUB)
+    if nav_map is not None:
+        percorrer(nav_map, 1)
+    return saida
+
+def _entradas_nav(dados):
+    """<nav epub:type="toc"> do EPUB 3 -> lista de (nivel, titulo)"""
+    saida = []
+
+    def percorrer(ol, nivel):
+        for li in ol.findall('x:li', NS_EPUB):
+            rotulo = li.find('x:a', NS_EPUB)
+            if rotulo is None:
+                rotulo = li.find('x:span', NS_EPUB)
+            if rotulo is not None:
+                saida.append((nivel, _texto_elemento(rotulo)))
+            sub = li.find('x:ol', NS_EPUB)
+            if sub is not None:
+                percorrer(sub, nivel + 1)
+
+    navs = list(ET.fromstring(dados).iter('{%s}nav' % NS_EPUB['x']))
+    nav = next((n for n in navs if 'toc' in (n.get(_EPUB_TYPE) or '').split()), navs[0] if navs else None)
+    if nav is not None:
+        ol = nav.find('x:ol', NS_EPUB)
+        if ol is not None:
+            percorrer(ol, 1)
+    return saida
+
+def _entradas_epub_leve(zf, itens):
+    """Sumário estruturado a partir do NCX (como o ebooklib) ou do nav"""
+    ncx = next((i for i in itens if 'ncx' in i['props'] or i['tipo'] == 'application/x-dtbncx+xml'), None)
+    if ncx:
+        entradas = _entradas_ncx(zf.read(ncx['caminho']))
+        if entradas:
+            return entradas
+    nav = next((i for i in itens if 'nav' in i['props']), None)
+    if nav:
+        return _entradas_nav(zf.read(nav['caminho']))
+    return []
+
+def _texto_toc_epub_leve(zf, itens, entradas):
+    """Texto do documento de sumário (toc/sumario/nav/contents) ou, sem ele, das entradas"""
+    for item in itens:
+        if item['tipo'] != 'application/xhtml+xml':
+            continue
+        name = item['href'].lower()
+        if any(x in name for x in ['toc', 'sumario', 'nav', 'contents']):
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(zf.read(item['caminho']), 'html.parser')
+            return (soup.body or soup).get_text(separator='\n')
+    if entradas:
+        return "".join(f"{titulo}\n" for _, titulo in entradas)
+    return None
+
+def _achatar_toc_epub(itens, nivel=1, saida=None):
+    """Converte o book.toc do ebooklib (Links e tuplas Section/filhos) em (nivel, titulo)"""
+    if saida is None:
+        saida = []
+    for item in itens:
+        if isinstance(item, (tuple, list)):
+            secao, filhos = item[0], item[1]
+            saida.append((nivel, secao.title))
+            _achatar_toc_epub(filhos, nivel + 1, saida)
+        else:
+            saida.append((nivel, item.title))
+    return saida
+
+def ler_toc_epub(epub_path):
+    """
+    Lê o epub uma única vez e devolve o sumário estruturado e o texto.
+    Abre o epub como zip e lê só o OPF, o nav/NCX e o documento de
+    sumário; o ebooklib (que carrega o livro inteiro, imagens inclusive)
+    só é usado se o epub estiver fora do padrão.
+
+    Returns:
+        tuple: (entradas, texto) — entradas = lista de (nivel, titulo) ou
+               None; texto = texto do sumário ou None
+    """
+    try:
+        with zipfile.ZipFile(epub_path) as zf:
+            itens = _ler_manifesto_epub(zf)
+            entradas = _entradas_epub_leve(zf, itens) or None
+            return entradas, _texto_toc_epub_leve(zf, itens, entradas)
+    except Exception:
+        pass
+    try:
+        import ebooklib
+        from ebooklib import epub
+        from bs4 import BeautifulSoup
+        book = epub.read_epub(epub_path)
+        entradas = _achatar_toc_epub(book.toc) if book.toc else None
+        for item in book.get_items_of_type(ebooklib.ITEM_DOCUMENT):
+            name = item.get_name().lower()
+            if any(x in name for x in ['toc', 'sumario', 'nav', 'contents']):
+                soup = BeautifulSoup(item.get_content(), 'html.parser')
+                return entradas, soup.get_text(separator='\n')
+        if book.toc:
+            t = ""
+            for x in book.toc: t += f"{x.title if hasattr(x, 'title') else x[0].title}\n"
+            return entradas, t
+        return entradas, None
+    except: pass
+    return None, None
+
+def extrair_entradas_toc_pdf(pdf_path):
+    """Outline do PDF como lista de (nivel, titulo), ou None"""
+    doc = abrir_pdf(pdf_path)
+    try:
+        toc = doc.get_toc()
+        return [(x[0], x[1]) for x in toc] if toc else None
+    finally:
+        doc.close()
+
+def extrair_toc_pdf(pdf_path):
+    doc = abrir_pdf(pdf_path)
+    try:
+        toc = doc.get_toc()
+        if toc: return "\n".join([x[1] for x in toc])
+
+        paginas, linhas_cache = localizar_paginas_toc(doc)
+        if not paginas:
+            return None
+
+        linhas = []
+        for i in paginas:
+            linhas_pag = linhas_cache.get(i) or _linhas_pagina(doc[i])
+            if i == paginas[0]:
+                # Descarta o cabeçalho corrido acima do título
+                idx_titulo = next((k for k, l in enumerate(linhas_pag) if _eh_titulo_sumario(l)), 0)
+                linhas_pag = linhas_pag[idx_titulo:]
+            linhas.extend(linhas_pag)
+        return "\n".join(linhas)
+    finally:
+        doc.close()
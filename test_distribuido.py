@@ -0,0 +1,128 @@
+"""
+Testes dos leases do distribuido.py com vários nós locais (processos) sobre
+a mesma pasta: lease expirado recuperado por um só nó, lease vivo respeitado
+e nenhum livro processado duas vezes.
+
+Rodar com:
+    python -m pytest -q test_distribuido.py
+"""
+import os
+import json
+import time
+import threading
+import multiprocessing
+
+import pytest
+
+import distribuido
+
+# fork: os processos herdam os monkeypatches do teste
+CONTEXTO = multiprocessing.get_context("fork")
+
+def _processar_falso(isbn, indice, etapas, sumarios_ia, input_dir, output_dir):
+    """Registra quem processou o livro em vez de rodar o pipeline"""
+    with open(os.path.join(output_dir, "processados.log"), "a") as f:
+        f.write(f"{isbn} {os.getpid()}\n")
+    time.sleep(0.2)
+
+def _processados(output_dir):
+    caminho = os.path.join(output_dir, "processados.log")
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho) as f:
+        return [linha.split()[0] for linha in f]
+
+def _gravar_lock(pasta, isbn, no, idade_s=0):
+    caminho = os.path.join(pasta, f"{isbn}.lock")
+    with open(caminho, "w") as f:
+        json.dump({'no': no, 'token': f"token-{no}", 'inicio': time.time() - idade_s}, f)
+    instante = time.time() - idade_s
+    os.utime(caminho, (instante, instante))
+    return caminho
+
+def _no_vivo(pasta, isbn, duracao_s, parar):
+    """Nó de fora dos processos do teste: mantém o heartbeat e depois conclui"""
+    caminho = os.path.join(pasta, f"{isbn}.lock")
+    fim = time.time() + duracao_s
+    while time.time() < fim and not parar.is_set():
+        os.utime(caminho)
+        time.sleep(0.1)
+    distribuido.concluir(os.path.dirname(pasta), isbn, "vivo", "token-vivo", 'ok', duracao_s)
+
+@pytest.fixture
+def pastas(tmp_path, monkeypatch):
+    input_dir = tmp_path / "entrada"
+    output_dir = tmp_path / "saida"
+    input_dir.mkdir()
+    for isbn in ("111", "222", "333", "444", "555"):
+        (input_dir / f"{isbn}_miolo.pdf").write_bytes(b"")
+    monkeypatch.setattr(distribuido, "processar_livro", _processar_falso)
+    monkeypatch.setattr(distribuido, "estimar_custos", lambda isbns, indice, etapas: {i: 1.0 for i in isbns})
+    monkeypatch.setattr(distribuido, "LEASE_EXPIRA_S", 3)
+    monkeypatch.setattr(distribuido, "LEASE_HEARTBEAT_S", 0.1)
+    monkeypatch.setattr(distribuido, "LEASE_ESPERA_S", 0.1)
+    pasta = os.path.join(str(output_dir), distribuido.LEASE_PASTA)
+    os.makedirs(pasta)
+    return str(input_dir), str(output_dir), pasta
+
+def test_varios_nos_com_lease_expirado_e_vivo(pastas):
+    input_dir, output_dir, pasta = pastas
+    # 111: nó que caiu há muito tempo; 222: nó vivo que termina sozinho
+    _gravar_lock(pasta, "111", "caido", idade_s=3600)
+    _gravar_lock(pasta, "222", "vivo")
+    parar = threading.Event()
+    vivo = threading.Thread(target=_no_vivo, args=(pasta, "222", 1.5, parar))
+    vivo.start()
+    nos = [CONTEXTO.Process(target=distribuido.executar_no,
+                            args=(input_dir, output_dir, ['ensaio'], f"no{i}")) for i in range(4)]
+    try:
+        for p in nos:
+            p.start()
+        for p in nos:
+            p.join(30)
+            assert p.exitcode == 0
+    finally:
+        parar.set()
+        vivo.join()
+        for p in nos:
+            if p.is_alive():
+                p.terminate()
+
+    processados = _processados(output_dir)
+    # Cada livro uma vez só; o do nó vivo não foi tocado
+    assert sorted(processados) == ["111", "333", "444", "555"]
+    for isbn in ("111", "222", "333", "444", "555"):
+        assert distribuido._ler_json(os.path.join(pasta, f"{isbn}.feito"))['status'] == 'ok'
+    assert distribuido._ler_json(os.path.join(pasta, "222.feito"))['no'] == "vivo"
+    assert distribuido._ler_json(os.path.join(pasta, "111.feito"))['no'].startswith("no")
+    # Nenhum lock, marca de recuperação ou arquivo de relógio sobrando
+    assert sorted(os.listdir(pasta)) == [f"{i}.feito" for i in ("111", "222", "333", "444", "555")]
+
+def _tentar_recuperar(caminho, no, saida):
+    saida.put((no, distribuido._recuperar_expirado(caminho, no)))
+
+def test_lease_expirado_e_recuperado_por_um_no_so(pastas):
+    _, _, pasta = pastas
+    caminho = _gravar_lock(pasta, "111", "caido", idade_s=3600)
+    saida = CONTEXTO.Queue()
+    nos = [CONTEXTO.Process(target=_tentar_recuperar, args=(caminho, f"no{i}", saida)) for i in range(6)]
+    for p in nos:
+        p.start()
+    resultados = [saida.get(timeout=30) for _ in nos]
+    for p in nos:
+        p.join()
+
+    vencedores = [(no, r) for no, r in resultados if r]
+    assert len(vencedores) == 1
+    no, (antigo, token) = vencedores[0]
+    assert antigo['no'] == "caido"
+    dados = distribuido._ler_json(caminho)
+    assert (dados['no'], dados['token']) == (no, token)
+    assert os.listdir(pasta) == ["111.lock"]
+
+def test_lease_vivo_nao_e_recuperado(pastas):
+    _, _, pasta = pastas
+    caminho = _gravar_lock(pasta, "222", "vivo")
+    assert distribuido._recuperar_expirado(caminho, "outro") is None
+    assert distribuido._ler_json(caminho)['token'] == "token-vivo"
+    assert os.listdir(pasta) == ["222.lock"]
@@ -0,0 +1,115 @@
+"""
+Testes das partes do ia_local.py que não dependem do servidor: leitura
+do streaming, divisão em blocos e união das respostas.
+
+Rodar com:
+    python -m pytest -q test_ia_local.py
+"""
+import json
+
+import ia_local
+from ia_local import _ler_stream, dividir_em_blocos, unir_respostas, estimar_tokens
+
+class RespostaFalsa:
+    """Imita o requests.Response de streaming: linhas SSE com pedaços do texto"""
+
+    status_code = 200
+
+    def __init__(self, pedacos, done=True):
+        self.linhas = [""]
+        for pedaco in pedacos:
+            self.linhas.append("data: " + json.dumps({'choices': [{'delta': {'content': pedaco}}]}))
+            self.linhas.append("")
+        if done:
+            self.linhas.append("data: [DONE]")
+        self.lidas = 0
+        self.fechada = False
+
+    def iter_lines(self, decode_unicode=True):
+        for linha in self.linhas:
+            self.lidas += 1
+            yield linha
+
+    def close(self):
+        self.fechada = True
+
+# --- _ler_stream ---
+
+def test_stream_com_varios_paragrafos_nao_e_cortado():
+    pedacos = ["<p><b>Parte I</b> - A<br />", "<b>Capítulo 1</b> - B</p>\n",
+               "<p><b>Parte II</b> - C<br />", "<b>Capítulo 2</b> - D</p>\n"]
+    resposta = RespostaFalsa(pedacos)
+    texto = _ler_stream(resposta, 10_000, "<p")
+    assert texto == "".join(pedacos)
+    assert ia_local._extrair_html(texto).count("<p>") == 2
+    assert resposta.fechada
+
+def test_stream_termina_no_done():
+    resposta = RespostaFalsa(["<p>A</p>"])
+    resposta.linhas.append("data: " + json.dumps({'choices': [{'delta': {'content': "lixo"}}]}))
+    assert _ler_stream(resposta, 10_000, "<p") == "<p>A</p>"
+
+def test_stream_sem_done_le_ate_o_fim():
+    assert _ler_stream(RespostaFalsa(["<p>A", "</p>"], done=False), 10_000, "<p") == "<p>A</p>"
+
+def test_stream_fora_do_formato_e_interrompido():
+    resposta = RespostaFalsa(["Claro! Aqui está", " o sumário", "<p>A</p>"])
+    assert _ler_stream(resposta, 10_000, "<p") is None
+    assert resposta.fechada
+    assert resposta.lidas < len(resposta.linhas)
+
+def test_stream_aceita_cerca_de_codigo():
+    assert _ler_stream(RespostaFalsa(["```html\n", "<p>A</p>\n```"]), 10_000, "<p") == "```html\n<p>A</p>\n```"
+
+def test_stream_grande_demais_e_descartado():
+    resposta = RespostaFalsa(["<p>" + "x" * 50] * 10)
+    assert _ler_stream(resposta, 200, "<p") is None
+    assert resposta.fechada
+
+def test_lote_mantem_todos_os_paragrafos_do_ultimo_isbn(monkeypatch):
+    import requests
+    pedacos = ["### ISBN 111\n", "<p><b>Capítulo 1</b> - A</p>\n",
+               "### ISBN 222\n", "<p><b>Parte I</b> - B</p>\n", "<p><b>Parte II</b> - C</p>\n"]
+    monkeypatch.setattr(requests, "post", lambda *a, **k: RespostaFalsa(pedacos))
+    resultados = ia_local._requisitar_lote(["111", "222"], {"111": "1 A", "222": "Parte I B\nParte II C"})
+    assert resultados == {"111": "<p><b>Capítulo 1</b> - A</p>",
+                          "222": "<p><b>Parte I</b> - B</p><p><b>Parte II</b> - C</p>"}
+
+# --- dividir_em_blocos ---
+
+def test_texto_pequeno_fica_em_um_bloco():
+    texto = "1 Um\n2 Dois"
+    assert dividir_em_blocos(texto, 1000) == [texto]
+
+def test_blocos_respeitam_orcamento_e_mantem_as_linhas():
+    linhas = [f"{i} Capítulo de número {i}" for i in range(1, 61)]
+    texto = "\n".join(linhas)
+    limite = estimar_tokens(texto) // 4
+    blocos = dividir_em_blocos(texto, limite)
+    assert len(blocos) > 1
+    assert "\n".join(blocos).splitlines() == linhas
+    assert all(estimar_tokens(b) <= limite for b in blocos)
+
+def test_corte_antes_da_parte():
+    linhas = [f"{i} Capítulo {i}" for i in range(1, 9)]
+    linhas += ["Parte II Segunda"] + [f"{i} Capítulo {i}" for i in range(9, 13)]
+    texto = "\n".join(linhas)
+    # O 1º bloco encheria no capítulo 10; o corte volta para antes da Parte II
+    blocos = dividir_em_blocos(texto, 44)
+    assert len(blocos) == 2
+    assert blocos[1].startswith("Parte II")
+
+# --- unir_respostas ---
+
+def test_bloco_sem_parte_continua_o_paragrafo_anterior():
+    respostas = ["<p><b>Parte I</b> - A<br /><b>Capítulo 1</b> - B</p>",
+                 "<p><b>Capítulo 2</b> - C</p>"]
+    assert unir_respostas(respostas) == (
+        "<p><b>Parte I</b> - A<br /><b>Capítulo 1</b> - B<br /><b>Capítulo 2</b> - C</p>")
+
+def test_bloco_com_parte_abre_paragrafo_novo():
+    respostas = ["<p><b>Parte I</b> - A</p>", "<p><b>Parte II</b> - B</p>"]
+    assert unir_respostas(respostas) == "<p><b>Parte I</b> - A</p><p><b>Parte II</b> - B</p>"
+
+def test_respostas_vazias_sao_ignoradas():
+    assert unir_respostas(["", "  <p>A</p> ", ""]) == "<p>A</p>"
@@ -0,0 +1,107 @@
+"""
+Testes do executar_com_memoria (memoria.py) com workers reais.
+
+Rodar com:
+    python -m pytest -q test_memoria.py
+"""
+import os
+import time
+import signal
+import multiprocessing
+
+import pytest
+
+import memoria
+from memoria import executar_com_memoria
+
+def _tarefa(args):
+    """Registra a execução (pid, início, fim) e, conforme o modo, derruba o worker"""
+    pasta, chave, modo = args
+    log = os.path.join(pasta, f"{chave}.log")
+    with open(log, "a") as f:
+        f.write(f"inicio {os.getpid()} {time.time()}\n")
+    if modo == "mata" or (modo == "mata_uma_vez" and not os.path.exists(log + ".morto")):
+        open(log + ".morto", "w").close()
+        os.kill(os.getpid(), signal.SIGKILL)
+    time.sleep(0.3)
+    with open(log, "a") as f:
+        f.write(f"fim {os.getpid()} {time.time()}\n")
+    return chave.upper()
+
+def _execucoes(pasta, chave):
+    """[(inicio, fim)] de cada execução completa da tarefa"""
+    inicios, fins = [], []
+    with open(os.path.join(pasta, f"{chave}.log")) as f:
+        for linha in f:
+            tipo, _, instante = linha.split()
+            (inicios if tipo == "inicio" else fins).append(float(instante))
+    return inicios, fins
+
+def _sobrepostas(intervalos):
+    """Maior número de intervalos (inicio, fim) abertos ao mesmo tempo"""
+    eventos = sorted([(i, 1) for i, _ in intervalos] + [(f, -1) for _, f in intervalos])
+    abertos = maximo = 0
+    for _, delta in eventos:
+        abertos += delta
+        maximo = max(maximo, abertos)
+    return maximo
+
+@pytest.fixture(autouse=True)
+def sem_limite_de_memoria(monkeypatch):
+    # A memória da máquina de teste não deve pausar o despacho
+    monkeypatch.setattr(memoria, "memoria_disponivel_mb", lambda: None)
+    monkeypatch.setattr(memoria, "MEM_AMOSTRAGEM_S", 0.05)
+
+def test_sem_falhas(tmp_path):
+    tarefas = [(c, (str(tmp_path), c, "ok")) for c in "abcd"]
+    resultados = {c: (r, e) for c, r, e in executar_com_memoria(_tarefa, tarefas, 2)}
+    assert resultados == {c: (c.upper(), None) for c in "abcd"}
+    intervalos = [(i[0], f[0]) for i, f in (_execucoes(tmp_path, c) for c in "abcd")]
+    assert _sobrepostas(intervalos) == 2
+
+def test_livro_que_derruba_o_worker_vira_erro_sem_prejudicar_os_outros(tmp_path, monkeypatch):
+    monkeypatch.setattr(memoria, "MEM_MAX_TENTATIVAS", 2)
+    pasta = str(tmp_path)
+    tarefas = [("a", (pasta, "a", "ok")), ("veneno", (pasta, "veneno", "mata"))]
+    tarefas += [(c, (pasta, c, "ok")) for c in "bcde"]
+
+    resultados = {c: (r, e) for c, r, e in executar_com_memoria(_tarefa, tarefas, 2)}
+
+    assert resultados["veneno"][0] is None
+    assert "worker encerrado" in resultados["veneno"][1]
+    for c in "abcde":
+        assert resultados[c] == (c.upper(), None)
+    # Uma execução no pool cheio + MEM_MAX_TENTATIVAS sozinho; o inocente
+    # que estava no mesmo pool não é cobrado e roda no máximo mais uma vez
+    inicios, _ = _execucoes(pasta, "veneno")
+    assert len(inicios) == 1 + 2
+    inicios, fins = _execucoes(pasta, "a")
+    assert len(fins) == 1 and len(inicios) <= 2
+    # Depois do isolamento o resto da fila volta a rodar com 2 workers
+    intervalos = [(i[-1], f[-1]) for i, f in (_execucoes(pasta, c) for c in "bcde")]
+    assert _sobrepostas(intervalos) == 2
+
+def test_falha_transitoria_e_reexecutada(tmp_path):
+    pasta = str(tmp_path)
+    tarefas = [("a", (pasta, "a", "mata_uma_vez")), ("b", (pasta, "b", "ok"))]
+    resultados = {c: (r, e) for c, r, e in executar_com_memoria(_tarefa, tarefas, 2)}
+    assert resultados == {"a": ("A", None), "b": ("B", None)}
+    inicios, fins = _execucoes(pasta, "a")
+    assert len(inicios) == 2 and len(fins) == 1
+
+def test_memoria_baixa_pausa_o_despacho(tmp_path, monkeypatch):
+    monkeypatch.setattr(memoria, "memoria_disponivel_mb", lambda: 0)
+    tarefas = [(c, (str(tmp_path), c, "ok")) for c in "abc"]
+    resultados = {c: e for c, _, e in executar_com_memoria(_tarefa, tarefas, 3)}
+    assert resultados == {"a": None, "b": None, "c": None}
+    intervalos = [(i[0], f[0]) for i, f in (_execucoes(tmp_path, c) for c in "abc")]
+    assert _sobrepostas(intervalos) == 1
+
+def test_pids_sem_atributo_interno_usa_processos_filhos():
+    filho = multiprocessing.Process(target=time.sleep, args=(2,))
+    filho.start()
+    try:
+        assert filho.pid in memoria._pids_workers(object())
+    finally:
+        filho.terminate()
+        filho.join()
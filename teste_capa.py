@@ -3,6 +3,8 @@ import fitz  # PyMuPDF
 import cv2
 import numpy as np
 
+from perfis_render import renderizar_perfil
+
 # --- CONFIG ---
 INPUT_DIR = "./entrada"
 OUTPUT_DIR = "./saida_teste_capa"
@@ -58,14 +60,14 @@ def detectar_altura_dark_gray(page):
     WIDTH_SCAN_MM = 50 # Escaneia uma faixa larga (50mm) para garantir que pega o início
     width_pt = WIDTH_SCAN_MM * MM_TO_PT
     clip_rect = fitz.Rect(0, 0, width_pt, page.rect.height)
-    pix = page.get_pixmap(clip=clip_rect, dpi=300)
+    # Perfil draft: só análise, já em cinza e sem anti-aliasing
+    pix = renderizar_perfil(page, 'draft', clip=clip_rect, dpi=300)
     
     img_data = np.frombuffer(pix.samples, dtype=np.uint8).copy()
     img = img_data.reshape(pix.h, pix.w, pix.n)
-    if pix.n >= 4: img = cv2.cvtColor(img, cv2.COLOR_RGBA2RGB)
     
-    # 2. Converte para Grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    # 2. Grayscale (o draft já vem em cinza)
+    gray = img[:, :, 0].copy() if pix.n == 1 else cv2.cvtColor(img[:, :, :3], cv2.COLOR_RGB2GRAY)
     
     # 3. THRESHOLD AJUSTADO PARA CINZA ESCURO
     # Inverte: Tinta (0 a ~200) vira BRANCO (255). Papel (200-255) vira PRETO (0).
@@ -157,7 +159,8 @@ def detectar_altura_dark_gray(page):
 # DEBUGGER
 # ==============================================================================
 def gerar_debug(page, cols, y_top, y_bottom, x_lombada_esq, x_lombada_dir, rect_capa, rect_quarta, img_mask_color, path_out):
-    pix = page.get_pixmap(dpi=300)
+    # Mesma escala do scanner (a máscara é sobreposta pixel a pixel)
+    pix = renderizar_perfil(page, 'preview', dpi=300)
     img_data = np.frombuffer(pix.samples, dtype=np.uint8).copy()
     img = img_data.reshape(pix.h, pix.w, pix.n)
     if pix.n >= 4: img = cv2.cvtColor(img, cv2.COLOR_RGBA2RGB)
@@ -226,8 +229,8 @@ def main():
             rect_quarta = fitz.Rect(x_inicio_quarta, y_cut_top, x_lombada_esq, y_cut_bottom)
             
             print(f"[SUCESSO] Capa: {rect_capa}")
-            page.get_pixmap(clip=rect_capa, dpi=300).save(os.path.join(OUTPUT_DIR, "_capa_v18.png"))
-            page.get_pixmap(clip=rect_quarta, dpi=300).save(os.path.join(OUTPUT_DIR, "_quartacapa_v18.png"))
+            renderizar_perfil(page, 'final', clip=rect_capa).save(os.path.join(OUTPUT_DIR, "_capa_v18.png"))
+            renderizar_perfil(page, 'final', clip=rect_quarta).save(os.path.join(OUTPUT_DIR, "_quartacapa_v18.png"))
         else:
             print("[FALHA] Lombada não encontrada.")
             
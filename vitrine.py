@@ -0,0 +1,231 @@
+"""
+Vitrine - Módulo
+----------------
+Escolhe e renderiza as imagens de vitrine (_vi_) do miolo.
+
+A escolha pontua as páginas do intervalo de forma barata (densidade de
+texto, área de imagens e tinta numa miniatura em baixa resolução),
+descarta páginas em branco ou quase (sem texto/imagem/desenho na área
+útil, sem nem renderizar; ou pela tinta e variância da miniatura) e sorteia, com semente, uma das melhores
+páginas de cada trecho do intervalo. Só as escolhidas são renderizadas
+na resolução final.
+
+Documentos do PyMuPDF não são thread-safe, então a renderização é
+distribuída em processos: cada worker abre seu próprio handle do PDF e
+renderiza uma faixa contígua de páginas. Dentro de um worker (lote,
+nós locais do distribuido) as páginas são renderizadas em série.
+
+Uso:
+    from vitrine import selecionar_paginas, renderizar_paginas
+
+    indices = selecionar_paginas(doc, qtd=10, semente=isbn)
+    renderizar_paginas(caminho_pdf, [(0, "livro_vi_01.png"), (5, "livro_vi_02.png")])
+"""
+import os
+import math
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import fitz
+import numpy as np
+
+from cache_render import renderizar, salvar_png
+from perfis_render import aplicar_perfil
+from leitura_pdf import abrir_pdf
+
+VITRINE_DPI = 150
+
+# --- CONFIGURAÇÕES DE SELEÇÃO ---
+# Quantidade de imagens de vitrine (incluindo as páginas fixas)
+VITRINE_QTD = 4
+
+# Intervalo de páginas do miolo considerado (início inclusivo, fim exclusivo)
+VITRINE_INICIO = 0
+VITRINE_FIM = 15
+
+# Páginas sempre incluídas (se não estiverem em branco)
+VITRINE_FIXAS = [0]
+
+# Semente do sorteio. None = usa o ISBN (reexecuções geram as mesmas páginas)
+VITRINE_SEMENTE = None
+
+# Miniatura usada para medir a tinta da página
+VITRINE_DPI_MINIATURA = 20
+
+# --- CONFIGURAÇÕES DE PÁGINA EM BRANCO ---
+# Nível de cinza (0-255) abaixo do qual o pixel conta como tinta
+BRANCO_LIMIAR_TINTA = 200
+
+# Fração mínima de pixels com tinta para a página não ser considerada em branco
+BRANCO_TINTA_MINIMA = 0.005
+
+# Desvio padrão mínimo dos pixels; abaixo disso a página é lisa (fundo chapado)
+BRANCO_DESVIO_MINIMO = 6.0
+
+# Dentro de cada trecho, sorteia entre as páginas com pontuação >= esta fração da melhor
+VITRINE_FRACAO_MELHOR = 0.8
+
+# Máximo de processos por livro
+VITRINE_MAX_WORKERS = 4
+
+# Abaixo disso, o custo de subir os processos não compensa
+VITRINE_MIN_PAGINAS_PARALELO = 6
+
+# --- DETECÇÃO DE PÁGINA EM BRANCO ---
+
+def _tem_conteudo(page, clip=None):
+    """Checagem sem renderizar: a página tem texto, imagem ou desenho na área útil?"""
+    area = clip or page.rect
+    if page.get_text("text", clip=clip).strip():
+        return True
+    if any(fitz.Rect(info['bbox']).intersects(area) for info in page.get_image_info()):
+        return True
+    # Marcas de corte ficam fora da área útil e não contam
+    return any(fitz.Rect(d['rect']).intersects(area) for d in page.get_drawings())
+
+def _miniatura_cinza(page, clip=None):
+    """Renderiza a página em baixa resolução (perfil draft) como array NumPy"""
+    with aplicar_perfil('draft') as p:
+        pix = renderizar(page, VITRINE_DPI_MINIATURA, clip=clip, colorspace=p['colorspace'])
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+
+def _classificar_miniatura(px):
+    """
+    Classifica a miniatura pela cobertura de tinta e pela variância dos pixels.
+    Páginas lisas (brancas ou com fundo chapado) e quase vazias
+    (só um fólio ou uma linha solta) contam como em branco.
+
+    Returns:
+        tuple: (em_branco, fração de tinta)
+    """
+    if px.size == 0:
+        return True, 0.0
+    tinta = float(np.count_nonzero(px < BRANCO_LIMIAR_TINTA)) / px.size
+    desvio = float(px.std())
+    return tinta < BRANCO_TINTA_MINIMA or desvio < BRANCO_DESVIO_MINIMO, tinta
+
+def pontuar_pagina(page, clip=None):
+    """
+    Pontuação barata de quão "representativa" é uma página (0 a 1).
+
+    Returns:
+        dict com 'texto', 'imagens', 'tinta' (frações 0-1) e 'pontuacao',
+        ou None se a página estiver em branco
+    """
+    if not _tem_conteudo(page, clip):
+        # Em branco: nem chega a renderizar a miniatura
+        return None
+
+    area = clip or page.rect
+    area_total = max(area.width * area.height, 1)
+
+    # Densidade de texto (uma página corrida tem ~1500+ caracteres)
+    texto = min(len(page.get_text("text", clip=clip).strip()) / 1500, 1.0)
+
+    # Área coberta por imagens
+    area_img = 0
+    for info in page.get_image_info():
+        r = fitz.Rect(info['bbox']) & area
+        if not r.is_empty:
+            area_img += r.width * r.height
+    imagens = min(area_img / area_total, 1.0)
+
+    # Tinta numa miniatura em tons de cinza
+    em_branco, tinta = _classificar_miniatura(_miniatura_cinza(page, clip))
+    if em_branco:
+        return None
+
+    pontuacao = 0.5 * texto + 0.3 * imagens + 0.2 * min(tinta * 5, 1.0)
+    return {'texto': texto, 'imagens': imagens, 'tinta': tinta, 'pontuacao': pontuacao}
+
+def selecionar_paginas(doc, qtd=VITRINE_QTD, inicio=VITRINE_INICIO, fim=VITRINE_FIM,
+                       fixas=VITRINE_FIXAS, semente=None, clip=None):
+    """
+    Escolhe as páginas da vitrine.
+
+    As páginas fixas entram primeiro; o restante do intervalo é dividido em
+    trechos contíguos (um por imagem) e, em cada trecho, é sorteada uma das
+    páginas com melhor pontuação. Páginas em branco nunca são escolhidas.
+
+    Args:
+        doc: Documento fitz do miolo
+        qtd: Total de páginas a escolher
+        inicio, fim: Intervalo de páginas considerado (fim exclusivo)
+        fixas: Páginas sempre incluídas, se não estiverem em branco
+        semente: Semente do sorteio (mesma semente = mesmas páginas)
+        clip: Área útil da página (sem as marcas de corte)
+
+    Returns:
+        list com os índices escolhidos, em ordem crescente
+    """
+    fim = min(fim, len(doc))
+    rng = random.Random(semente)
+
+    pontos = {}
+    for i in range(inicio, fim):
+        p = pontuar_pagina(doc[i], clip)
+        if p is not None:
+            pontos[i] = p['pontuacao']
+
+    escolhidas = [i for i in fixas if i in pontos][:qtd]
+    candidatas = [i for i in sorted(pontos) if i not in escolhidas]
+    restantes = min(qtd - len(escolhidas), len(candidatas))
+    if restantes <= 0:
+        return sorted(escolhidas)
+
+    # Um trecho contíguo por imagem, para espalhar a vitrine pelo intervalo
+    for trecho in np.array_split(np.array(candidatas), restantes):
+        trecho = [int(i) for i in trecho]
+        melhor = max(pontos[i] for i in trecho)
+        boas = [i for i in trecho if pontos[i] >= melhor * VITRINE_FRACAO_MELHOR]
+        escolhidas.append(rng.choice(boas))
+
+    return sorted(escolhidas)
+
+def _renderizar_faixa(pdf_path, tarefas, dpi, clip=None):
+    """Worker: abre o próprio handle do PDF e renderiza [(indice_pagina, caminho_png)]"""
+    clip = fitz.Rect(clip) if clip else None
+    doc = abrir_pdf(pdf_path)
+    try:
+        with aplicar_perfil('final'):
+            for page_idx, caminho in tarefas:
+                salvar_png(doc[page_idx], caminho, dpi, clip=clip)
+    finally:
+        doc.close()
+    return [caminho for _, caminho in tarefas]
+
+def renderizar_paginas(pdf_path, tarefas, dpi=VITRINE_DPI, max_workers=None, clip=None):
+    """
+    Renderiza páginas de um PDF em PNG, em paralelo quando compensa.
+
+    Args:
+        pdf_path: Caminho do PDF (cada worker abre o seu)
+        tarefas: lista de (indice_pagina, caminho_png)
+        dpi: Resolução das imagens (padrão 150)
+        max_workers: Máximo de processos (1 = sempre em série; padrão
+                     VITRINE_MAX_WORKERS, ou 1 dentro de um worker)
+        clip: Área da página a renderizar (ex.: sem as marcas de corte)
+
+    Returns:
+        list com os caminhos gerados, na ordem das tarefas
+    """
+    # Ordena por página para cada worker pegar uma faixa contígua; o retorno
+    # segue a ordem original das tarefas
+    ordenadas = sorted(tarefas)
+    clip = tuple(clip) if clip else None
+    if max_workers is None:
+        # Dentro de um worker do lote, um pool próprio disputaria as CPUs
+        # e escaparia do controle de memória do memoria.py
+        max_workers = 1 if multiprocessing.parent_process() else VITRINE_MAX_WORKERS
+    workers = min(max_workers, os.cpu_count() or 1, len(ordenadas))
+    if workers <= 1 or len(ordenadas) < VITRINE_MIN_PAGINAS_PARALELO:
+        _renderizar_faixa(pdf_path, ordenadas, dpi, clip)
+    else:
+        # Faixas contíguas de páginas, uma por worker
+        tamanho = math.ceil(len(ordenadas) / workers)
+        faixas = [ordenadas[k:k + tamanho] for k in range(0, len(ordenadas), tamanho)]
+        with ProcessPoolExecutor(max_workers=len(faixas)) as pool:
+            futuros = [pool.submit(_renderizar_faixa, pdf_path, faixa, dpi, clip) for faixa in faixas]
+            for futuro in futuros:
+                futuro.result()
+    return [caminho for _, caminho in tarefas]